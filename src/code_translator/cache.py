@@ -0,0 +1,100 @@
+"""Translation cache so repeated texts skip the LLM entirely."""
+
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+
+class TranslationCache:
+    """
+    Content-addressed translation cache.
+
+    Lookups hit an in-memory LRU first and then, if a path is given, a SQLite
+    table that survives between runs. Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        maxsize: int = 4096,
+        commit_every: int = 64,
+    ):
+        self.maxsize = maxsize
+        self.commit_every = commit_every
+        self._memory: OrderedDict[bytes, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._db: Optional[sqlite3.Connection] = None
+
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key BLOB PRIMARY KEY, value TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(model: str, source_lang: str, target_lang: str, text: str) -> bytes:
+        """Hash everything that determines a translation into a fixed-size key."""
+        h = hashlib.blake2b(digest_size=16)
+        for part in (model, source_lang, target_lang, text):
+            h.update(part.encode('utf-8'))
+            h.update(b'\0')
+        return h.digest()
+
+    def get(self, key: bytes) -> Optional[str]:
+        """Return the cached translation for key, or None."""
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                return value
+
+            if self._db is None:
+                return None
+            row = self._db.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._remember(key, row[0])
+            return row[0]
+
+    def put(self, key: bytes, value: str) -> None:
+        """Store a translation, committing to disk every commit_every inserts."""
+        with self._lock:
+            self._remember(key, value)
+            if self._db is None:
+                return
+            self._db.execute("INSERT OR IGNORE INTO cache (key, value) VALUES (?, ?)", (key, value))
+            self._pending += 1
+            if self._pending >= self.commit_every:
+                self._db.commit()
+                self._pending = 0
+
+    def flush(self) -> None:
+        """Commit any pending inserts to disk."""
+        with self._lock:
+            if self._db is not None and self._pending:
+                self._db.commit()
+                self._pending = 0
+
+    def close(self) -> None:
+        """Flush and close the on-disk cache."""
+        self.flush()
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def _remember(self, key: bytes, value: str) -> None:
+        """Insert into the in-memory LRU, evicting the oldest entry if full. Caller holds the lock."""
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
@@ -2,14 +2,11 @@
 
 import sys
 from pathlib import Path
+from typing import Optional
 import click
 from rich.console import Console
-from rich.table import Table
-from rich.panel import Panel
 
 from .config import Config
-from .translator import LocalTranslator, TranslationConfig
-from .processor import FileProcessor
 
 
 console = Console()
@@ -28,6 +25,8 @@ def print_banner():
 
 def print_stats(stats):
     """Print processing statistics."""
+    from rich.table import Table
+
     table = Table(title="Translation Statistics", show_header=True, header_style="bold magenta")
     table.add_column("Metric", style="cyan")
     table.add_column("Value", style="green", justify="right")
@@ -87,6 +86,11 @@ def print_stats(stats):
     default=True,
     help='Recursively process subdirectories (default: recursive)'
 )
+@click.option(
+    '--cache/--no-cache',
+    default=True,
+    help='Reuse translations from previous runs (default: cache)'
+)
 @click.option(
     '--config', '-c',
     type=click.Path(exists=True, path_type=Path),
@@ -107,6 +111,7 @@ def main(
     dry_run: bool,
     workers: int,
     recursive: bool,
+    cache: bool,
     config: Optional[Path],
     list_models: bool,
 ):
@@ -154,7 +159,7 @@ def main(
         app_config = Config.find_config(path)
 
     # Merge CLI args with config
-    app_config.merge_with_args(
+    app_config = app_config.merge_with_args(
         model=model,
         source_lang=source_lang,
         target_lang=target_lang,
@@ -162,11 +167,31 @@ def main(
         dry_run=dry_run,
         workers=workers,
         recursive=recursive,
+        cache=cache,
+    )
+
+    # Deferred so --help, --version and --list-models stay fast
+    from rich.panel import Panel
+    from rich.progress import (
+        BarColumn, MofNCompleteColumn, Progress, SpinnerColumn, TextColumn, TimeElapsedColumn,
+    )
+    from .translator import LocalTranslator, TranslationConfig
+    from .processor import FileProcessor
+
+    # Resolved first so the panel shows the model tag actually used
+    trans_config = TranslationConfig(
+        model=app_config.model,
+        source_lang=app_config.source_lang,
+        target_lang=app_config.target_lang,
+        temperature=app_config.temperature,
+        cache_path=app_config.cache_path or None,
+        num_thread=app_config.num_thread,
+        quantization=app_config.quantization,
     )
 
     # Show configuration
     config_panel = f"""
-    [cyan]Model:[/cyan] {app_config.model}
+    [cyan]Model:[/cyan] {trans_config.model}
     [cyan]Translation:[/cyan] {app_config.source_lang} → {app_config.target_lang}
     [cyan]Mode:[/cyan] {'Comments + Docstrings + Strings' if app_config.translate_all else 'Comments + Docstrings only'}
     [cyan]Dry Run:[/cyan] {'Yes' if app_config.dry_run else 'No'}
@@ -187,12 +212,6 @@ def main(
     # Initialize translator
     console.print("\n[cyan]Initializing translator...[/cyan]")
     try:
-        trans_config = TranslationConfig(
-            model=app_config.model,
-            source_lang=app_config.source_lang,
-            target_lang=app_config.target_lang,
-            temperature=app_config.temperature,
-        )
         translator = LocalTranslator(trans_config)
         console.print("[green]✓[/green] Translator ready\n")
     except Exception as e:
@@ -206,11 +225,25 @@ def main(
         translate_all=app_config.translate_all,
         dry_run=app_config.dry_run,
         max_workers=app_config.max_workers,
+        skip_dirs=app_config.skip_dirs,
+        skip_extensions=app_config.skip_extensions,
     )
 
     try:
-        with console.status("[cyan]Processing files...", spinner="dots"):
-            stats = processor.process_directory(path, recursive=app_config.recursive)
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[cyan]Processing files..."),
+            BarColumn(),
+            MofNCompleteColumn(),
+            TimeElapsedColumn(),
+            console=console,
+        ) as progress:
+            task = progress.add_task("translate", total=None)
+            stats = processor.process_directory(
+                path,
+                recursive=app_config.recursive,
+                on_progress=lambda done, total: progress.update(task, completed=done, total=total),
+            )
 
         # Print results
         console.print()
@@ -229,6 +262,8 @@ def main(
         import traceback
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        translator.close()
 
 
 if __name__ == '__main__':
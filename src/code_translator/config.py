@@ -1,11 +1,19 @@
 """Configuration management."""
 
+import functools
 import tomllib  # Python 3.11+ standard library
 from pathlib import Path
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from typing import Optional
 
 
+@functools.lru_cache(maxsize=64)
+def _load_toml(path_str: str, mtime_ns: int) -> dict:
+    """Parse a TOML file, memoized on (path, mtime) so unchanged files parse once."""
+    with open(path_str, 'rb') as f:
+        return tomllib.load(f)
+
+
 @dataclass
 class Config:
     """Configuration for code-translator."""
@@ -15,6 +23,10 @@ class Config:
     source_lang: str = "Chinese"
     target_lang: str = "English"
     temperature: float = 0.3
+    # Translations persist here between runs; empty string disables the disk cache
+    cache_path: str = "~/.cache/code-translator/translations.db"
+    num_thread: Optional[int] = None  # Ollama CPU threads; None uses the server default
+    quantization: Optional[str] = None  # e.g. "q4_0"; None uses the model's default tag
 
     # Processing settings
     translate_all: bool = False
@@ -22,30 +34,34 @@ class Config:
     max_workers: int = 4
     recursive: bool = True
 
-    # File filters
-    skip_dirs: list[str] = field(default_factory=lambda: [
+    # File filters (frozensets for O(1) membership tests during directory walks)
+    skip_dirs: frozenset[str] = field(default_factory=lambda: frozenset({
         '.git', '.svn', '.hg', '__pycache__', 'node_modules',
         'venv', '.venv', 'dist', 'build', 'target'
-    ])
-    skip_extensions: list[str] = field(default_factory=lambda: [
+    }))
+    skip_extensions: frozenset[str] = field(default_factory=lambda: frozenset({
         '.pyc', '.pyo', '.so', '.dll', '.exe', '.bin',
         '.jpg', '.jpeg', '.png', '.gif', '.svg',
         '.mp3', '.mp4', '.zip', '.tar', '.gz'
-    ])
+    }))
     file_patterns: Optional[list[str]] = None
 
     # Git settings
     auto_create_branch: bool = False
     branch_prefix: str = "translation/"
 
+    def __post_init__(self):
+        # Config files and callers supply lists; normalize them once here
+        self.skip_dirs = frozenset(self.skip_dirs)
+        self.skip_extensions = frozenset(self.skip_extensions)
+
     @classmethod
     def from_file(cls, config_path: Path) -> 'Config':
         """Load configuration from TOML file."""
         if not config_path.exists():
             return cls()
 
-        with open(config_path, 'rb') as f:
-            data = tomllib.load(f)
+        data = _load_toml(str(config_path), config_path.stat().st_mtime_ns)
 
         # Extract relevant sections
         config_dict = {}
@@ -62,7 +78,12 @@ class Config:
         if 'git' in data:
             config_dict.update(data['git'])
 
-        return cls(**{k: v for k, v in config_dict.items() if hasattr(cls, k)})
+        # Copy lists so callers can't mutate the cached parse result
+        known = {f.name for f in fields(cls)}
+        return cls(**{
+            k: list(v) if isinstance(v, list) else v
+            for k, v in config_dict.items() if k in known
+        })
 
     @classmethod
     def find_config(cls, start_dir: Path = None) -> Optional['Config']:
@@ -102,6 +123,9 @@ class Config:
             'source_lang': kwargs.get('source_lang') or self.source_lang,
             'target_lang': kwargs.get('target_lang') or self.target_lang,
             'temperature': self.temperature,
+            'cache_path': self.cache_path if kwargs.get('cache', True) else "",
+            'num_thread': self.num_thread,
+            'quantization': self.quantization,
             'translate_all': kwargs.get('translate_all', self.translate_all),
             'dry_run': kwargs.get('dry_run', self.dry_run),
             'max_workers': kwargs.get('workers') or self.max_workers,
@@ -1,11 +1,55 @@
 """Syntax-aware code parsing to extract translatable elements."""
 
+import functools
+import itertools
+import mmap
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from types import MappingProxyType
+from typing import Iterable, Iterator, Optional, Union
 from enum import Enum
 
+try:
+    # Optional linear-time DFA engine (pip install google-re2); immune to
+    # catastrophic backtracking in the string patterns
+    import re2 as _re_engine
+except ImportError:
+    _re_engine = re
+
+
+# CJK Unified Ideographs, Japanese kana and Korean hangul
+_CJK_RE = re.compile('[\u4e00-\u9fff\u3040-\u30ff\uac00-\ud7af]')
+
+_NEWLINE_RE = re.compile('\n')
+
+# UTF-8 lead bytes of the _CJK_RE ranges: E3 81-83 xx is U+3040-U+30FF and
+# E4-ED xx xx spans U+4000-U+DFFF. This is a superset used only as a prefilter
+# before decoding.
+_CJK_BYTES_RE = re.compile(rb'\xe3[\x81-\x83]|[\xe4-\xed]')
+# Any byte outside ASCII; files without one can skip decoding entirely
+_NON_ASCII_BYTES_RE = re.compile(rb'[\x80-\xff]')
+
+
+def _newline_offsets(content: str) -> list[int]:
+    """Return offsets of every newline in content, prefixed with -1 for line 0."""
+    return [-1] + [m.start() for m in _NEWLINE_RE.finditer(content)]
+
+
+def _line_text(content: str, nl_offsets: list[int], line: int) -> str:
+    """Return the text of one line (without its newline) by slicing content."""
+    end = nl_offsets[line + 1] if line + 1 < len(nl_offsets) else len(content)
+    return content[nl_offsets[line] + 1:end]
+
+
+def _line_col(nl_offsets: list[int], pos: int) -> tuple[int, int]:
+    """Map a character offset to a (line, column) pair via binary search."""
+    line = bisect_left(nl_offsets, pos) - 1
+    return line, pos - nl_offsets[line] - 1
+
 
 class ElementType(Enum):
     """Types of code elements that can be translated."""
@@ -15,7 +59,7 @@ class ElementType(Enum):
     IDENTIFIER = "identifier"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class CodeElement:
     """A translatable element in source code."""
     type: ElementType
@@ -25,6 +69,8 @@ class CodeElement:
     start_col: int
     end_col: int
     original_text: str  # Full original line(s) for reconstruction
+    start_offset: int = -1  # Character offsets of `text` within the file content
+    end_offset: int = -1
 
 
 class CodeParser:
@@ -63,7 +109,7 @@ class CodeParser:
         },
     }
 
-    LANGUAGE_EXTENSIONS = {
+    LANGUAGE_EXTENSIONS = MappingProxyType({
         '.py': 'python',
         '.js': 'javascript',
         '.jsx': 'javascript',
@@ -77,34 +123,26 @@ class CodeParser:
         '.cc': 'javascript',
         '.h': 'javascript',
         '.hpp': 'javascript',
-    }
+    })
 
     @staticmethod
     def detect_language(file_path: Path) -> Optional[str]:
         """Detect language from file extension."""
-        suffix = file_path.suffix.lower()
-        return CodeParser.LANGUAGE_EXTENSIONS.get(suffix)
+        # os.path.splitext on the name avoids Path.suffix's extra parsing
+        return _language_for_suffix(os.path.splitext(file_path.name)[1])
 
     @staticmethod
     def contains_non_ascii(text: str) -> bool:
         """
         Check if text contains CJK (Chinese, Japanese, Korean) characters.
 
-        This specifically targets CJK Unified Ideographs range (U+4E00 to U+9FFF)
-        which covers most Chinese characters. For broader CJK support including
-        Japanese kana and Korean hangul, extend the range check.
+        Covers CJK Unified Ideographs (U+4E00 to U+9FFF), Japanese kana
+        (U+3040 to U+30FF) and Korean hangul (U+AC00 to U+D7AF).
         """
-        # Check for CJK Unified Ideographs (most Chinese characters)
-        for char in text:
-            if '\u4e00' <= char <= '\u9fff':
-                return True
-            # Also check for Hiragana and Katakana (Japanese)
-            if '\u3040' <= char <= '\u30ff':
-                return True
-            # And Hangul (Korean)
-            if '\uac00' <= char <= '\ud7af':
-                return True
-        return False
+        # Most comments are pure ASCII; isascii() rejects them without a regex scan
+        if text.isascii():
+            return False
+        return _CJK_RE.search(text) is not None
 
     @staticmethod
     def extract_comments_and_docstrings(content: str, language: str) -> list[CodeElement]:
@@ -118,98 +156,344 @@ class CodeParser:
         Returns:
             List of CodeElement objects
         """
+        return CodeParser._extract(content, _COMMENT_SCANNERS.get(language), None)
+
+    @staticmethod
+    def extract_all_translatable(content: str, language: str) -> list[CodeElement]:
+        """
+        Extract ALL translatable elements including strings and identifiers.
+
+        This is more aggressive and may break code - use with caution!
+        """
+        return CodeParser._extract(
+            content, _COMMENT_SCANNERS.get(language), _STRING_PATTERNS.get(language)
+        )
+
+    @staticmethod
+    def _extract(
+        content: str,
+        comment_scanner: Optional[tuple[re.Pattern, dict]],
+        string_pattern: Optional[re.Pattern],
+    ) -> list[CodeElement]:
+        """
+        Shared extraction core for both public extract methods.
+
+        Args:
+            content: Source code content
+            comment_scanner: Fused comment pattern and its group table, or None
+            string_pattern: String literal pattern, or None to skip strings
+
+        Returns:
+            List of CodeElement objects
+        """
+        # Every element must contain CJK text, so pure-ASCII files have none.
+        # isascii() is a single C-level pass over the compact str buffer.
+        if content.isascii():
+            return []
+
         elements = []
-        patterns = CodeParser.PATTERNS.get(language, {})
+        nl_offsets = _newline_offsets(content)
+
+        comment_matches = ()
+        if comment_scanner is not None:
+            combined, kinds = comment_scanner
+            comment_matches = combined.finditer(content)
+
+        for match in comment_matches:
+            kind = kinds.get(match.lastgroup)
+            if kind is None:
+                # A string literal, consumed only so markers inside it are ignored
+                continue
+            element_type, line_based, first_group, group_count = kind
+            # Comment text is the first non-empty inner group (docstrings have
+            # one group per quote style)
+            group = next(filter(match.group, range(first_group, first_group + group_count)), None)
+            raw_text = match.group(group) if group is not None else ""
+            comment_text = raw_text.strip()
+
+            if not CodeParser.contains_non_ascii(comment_text):
+                continue
+
+            # Offsets of the stripped text alone, so a translation can be
+            # spliced in without touching markers or quotes around it
+            text_start = match.start(group) + len(raw_text) - len(raw_text.lstrip())
 
-        lines = content.split('\n')
+            start_line, start_col = _line_col(nl_offsets, match.start())
+            end_line, end_col = _line_col(nl_offsets, match.end())
 
-        # Extract line comments
-        if 'line_comment' in patterns:
-            for match in patterns['line_comment'].finditer(content):
-                comment_text = match.group(1).strip()
-                if CodeParser.contains_non_ascii(comment_text):
-                    # Find line number
-                    line_num = content[:match.start()].count('\n')
+            if line_based:
+                original_text = _line_text(content, nl_offsets, start_line)
+            else:
+                original_text = match.group(0)
+
+            elements.append(CodeElement(
+                type=element_type,
+                text=comment_text,
+                start_line=start_line,
+                end_line=end_line,
+                start_col=start_col,
+                end_col=end_col,
+                original_text=original_text,
+                start_offset=text_start,
+                end_offset=text_start + len(comment_text),
+            ))
+
+        if string_pattern is None:
+            return elements
+
+        # Build set of positions already covered by docstrings/comments to avoid
+        # duplicates: each element covers its whole lines, newline included
+        line_count = len(nl_offsets)
+        covered_ranges = sorted(
+            (
+                nl_offsets[elem.start_line] + 1,
+                nl_offsets[elem.end_line + 1] + 1 if elem.end_line + 1 < line_count
+                else len(content) + 1,
+            )
+            for elem in elements
+        )
+
+        # Merge overlapping ranges so each position falls in at most one
+        # interval, then binary-search the interval starts
+        covered = []
+        for start, end in covered_ranges:
+            if covered and start < covered[-1][1]:
+                covered[-1][1] = max(covered[-1][1], end)
+            else:
+                covered.append([start, end])
+        covered_starts = [start for start, _ in covered]
+
+        # Add string literals (excluding those already matched as docstrings)
+        for match in string_pattern.finditer(content):
+            # Check if this match falls inside a covered range
+            match_start = match.start()
+            match_end = match.end()
+
+            idx = bisect_right(covered_starts, match_start) - 1
+            is_covered = idx >= 0 and match_end <= covered[idx][1]
+
+            if not is_covered:
+                string_text = match.group(0)[1:-1]  # Remove quotes
+                if CodeParser.contains_non_ascii(string_text):
+                    line_num, start_col = _line_col(nl_offsets, match_start)
+                    _, end_col = _line_col(nl_offsets, match_end)
                     elements.append(CodeElement(
-                        type=ElementType.COMMENT,
-                        text=comment_text,
+                        type=ElementType.STRING_LITERAL,
+                        text=string_text,
                         start_line=line_num,
                         end_line=line_num,
-                        start_col=match.start() - content.rfind('\n', 0, match.start()) - 1,
-                        end_col=match.end() - content.rfind('\n', 0, match.end()) - 1,
-                        original_text=lines[line_num] if line_num < len(lines) else ""
+                        start_col=start_col,
+                        end_col=end_col,
+                        original_text=_line_text(content, nl_offsets, line_num),
+                        start_offset=match_start + 1,
+                        end_offset=match_end - 1,
                     ))
 
-        # Extract block comments / docstrings
-        for pattern_name in ['block_comment', 'docstring', 'javadoc', 'doc_comment']:
-            if pattern_name in patterns:
-                for match in patterns[pattern_name].finditer(content):
-                    # Get the actual comment text (group 1 or 2 for docstrings)
-                    comment_text = match.group(1) if match.group(1) else (match.group(2) or "")
-                    comment_text = comment_text.strip()
-
-                    if CodeParser.contains_non_ascii(comment_text):
-                        start_line = content[:match.start()].count('\n')
-                        end_line = content[:match.end()].count('\n')
-
-                        element_type = ElementType.DOCSTRING if 'doc' in pattern_name else ElementType.COMMENT
-
-                        elements.append(CodeElement(
-                            type=element_type,
-                            text=comment_text,
-                            start_line=start_line,
-                            end_line=end_line,
-                            start_col=match.start() - content.rfind('\n', 0, match.start()) - 1,
-                            end_col=match.end() - content.rfind('\n', 0, match.end()) - 1,
-                            original_text=match.group(0)
-                        ))
-
         return elements
 
     @staticmethod
-    def extract_all_translatable(content: str, language: str) -> list[CodeElement]:
+    def extract_from_path(
+        file_path: Path,
+        language: Optional[str] = None,
+        translate_all: bool = False,
+    ) -> list[CodeElement]:
         """
-        Extract ALL translatable elements including strings and identifiers.
+        Extract translatable elements directly from a file on disk.
 
-        This is more aggressive and may break code - use with caution!
+        Args:
+            file_path: File to parse
+            language: Programming language (detected from the extension if None)
+            translate_all: Also extract string literals
+
+        Returns:
+            List of CodeElement objects
+
+        Raises:
+            OSError: If the file cannot be read
+            UnicodeDecodeError: If a file that needs decoding is not valid UTF-8
         """
-        # Start with comments and docstrings
-        elements = CodeParser.extract_comments_and_docstrings(content, language)
+        language = language or CodeParser.detect_language(file_path)
+        if not language:
+            return []
+        parsed = CodeParser.read_and_extract(file_path, language, translate_all)
+        return parsed[1] if parsed else []
 
-        # Build set of positions already covered by docstrings/comments to avoid duplicates
-        covered_ranges = set()
-        for elem in elements:
-            # Mark character positions as covered
-            start_pos = sum(len(line) + 1 for i, line in enumerate(content.split('\n')[:elem.start_line]))
-            end_pos = sum(len(line) + 1 for i, line in enumerate(content.split('\n')[:elem.end_line + 1]))
-            covered_ranges.add((start_pos, end_pos))
+    @staticmethod
+    def read_and_extract(
+        file_path: Union[str, Path],
+        language: str,
+        translate_all: bool = False,
+    ) -> Optional[tuple[str, list[CodeElement]]]:
+        """
+        Read a file and extract its translatable elements.
 
-        # Add string literals (excluding those already matched as docstrings)
-        patterns = CodeParser.PATTERNS.get(language, {})
-        if 'string' in patterns:
-            for match in patterns['string'].finditer(content):
-                # Check if this match overlaps with any covered range
-                match_start = match.start()
-                match_end = match.end()
-
-                is_covered = any(
-                    match_start >= start and match_end <= end
-                    for start, end in covered_ranges
-                )
-
-                if not is_covered:
-                    string_text = match.group(0)[1:-1]  # Remove quotes
-                    if CodeParser.contains_non_ascii(string_text):
-                        line_num = content[:match.start()].count('\n')
-                        lines = content.split('\n')
-                        elements.append(CodeElement(
-                            type=ElementType.STRING_LITERAL,
-                            text=string_text,
-                            start_line=line_num,
-                            end_line=line_num,
-                            start_col=match.start() - content.rfind('\n', 0, match.start()) - 1,
-                            end_col=match.end() - content.rfind('\n', 0, match.end()) - 1,
-                            original_text=lines[line_num] if line_num < len(lines) else ""
-                        ))
+        The file is memory-mapped and its raw UTF-8 bytes are scanned for CJK
+        lead-byte sequences, so files without any CJK text are never parsed,
+        and pure-ASCII ones are never decoded. Line endings are normalized to
+        \\n like read_text() does. Free of instance state so it can run in
+        worker processes.
 
-        return elements
+        Args:
+            file_path: File to parse
+            language: Programming language
+            translate_all: Also extract string literals
+
+        Returns:
+            (content, elements), or None if the file holds no translatable text
+
+        Raises:
+            OSError: If the file cannot be read
+            UnicodeDecodeError: If a file that needs decoding is not valid UTF-8
+        """
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                has_cjk = _CJK_BYTES_RE.search(mm) is not None
+                # Pure ASCII can't hold CJK text or fail to decode, so most
+                # files stop here without ever becoming a str
+                if not has_cjk and _NON_ASCII_BYTES_RE.search(mm) is None:
+                    return None
+                # Decode straight from the mapping without an intermediate bytes
+                # copy; other non-ASCII files are decoded only so invalid UTF-8 raises
+                with memoryview(mm) as view:
+                    content = str(view, 'utf-8')
+        if not has_cjk:
+            return None
+
+        if '\r' in content:
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
+
+        if translate_all:
+            elements = CodeParser.extract_all_translatable(content, language)
+        else:
+            elements = CodeParser.extract_comments_and_docstrings(content, language)
+        return (content, elements) if elements else None
+
+    @classmethod
+    def parse_many(
+        cls,
+        paths: Iterable[Path],
+        translate_all: bool = False,
+        workers: int = 0,
+    ) -> Iterator[tuple[Path, list[CodeElement]]]:
+        """
+        Parse many files in parallel worker processes.
+
+        Results are yielded in input order. Paths are handed to workers in
+        chunks so small files don't each pay a pickling round-trip.
+        Unsupported or unreadable files yield an empty element list.
+
+        Args:
+            paths: Files to parse
+            translate_all: Also extract string literals
+            workers: Number of worker processes (0 = one per CPU)
+
+        Yields:
+            (path, elements) tuples
+        """
+        paths = list(paths)
+        workers = workers or os.cpu_count() or 1
+        # About four chunks per worker balances IPC overhead against stragglers
+        chunksize = max(1, len(paths) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(
+                _parse_path, paths, itertools.repeat(translate_all), chunksize=chunksize
+            )
+            yield from zip(paths, results)
+
+
+@functools.lru_cache(maxsize=256)
+def _language_for_suffix(suffix: str) -> Optional[str]:
+    """Map a raw file suffix to a language, lowercasing once per distinct suffix."""
+    return CodeParser.LANGUAGE_EXTENSIONS.get(suffix.lower())
+
+
+def _parse_path(file_path: Path, translate_all: bool) -> list[CodeElement]:
+    """Read and parse a single file; runs in parse_many worker processes."""
+    try:
+        return CodeParser.extract_from_path(file_path, translate_all=translate_all)
+    except (UnicodeDecodeError, OSError):
+        return []
+
+
+# Alternation priority when two comment patterns match at the same offset: the
+# documentation forms must win over the plain comment they also look like.
+_ALTERNATION_ORDER = ('javadoc', 'doc_comment', 'docstring', 'block_comment', 'line_comment')
+
+
+# String literals the comment scanner steps over, so a '#' or '//' inside
+# one ("http://...") is never taken for a comment marker. Quotes are
+# line-bounded where the language allows, so a stray quote (say a '"' char
+# literal) can't swallow the comments on the lines after it.
+_STRING_SKIP_PATTERNS = {
+    'python': r'"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\'',
+    'javascript': r'"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\'|`(?:[^`\\]|\\.)*`',
+    'java': r'"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)\'',
+    'go': r'"(?:[^"\\\n]|\\.)*"|`[^`]*`|\'(?:[^\'\\\n]|\\.)\'',
+    'rust': r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\\n]|\\.)\'',
+}
+
+
+def _build_comment_scanner(
+    patterns: dict[str, re.Pattern],
+    skip_pattern: Optional[str] = None,
+) -> Optional[tuple[re.Pattern, dict[str, tuple[ElementType, bool, int, int]]]]:
+    """
+    Fuse a language's comment patterns into one named alternation.
+
+    Each sub-pattern keeps its own flags via a scoped inline group, so the
+    whole file is scanned in a single finditer pass and match.lastgroup says
+    which kind of comment matched. If skip_pattern is given it is tried
+    last as a 'skip' group that has no entry in kinds.
+
+    Returns:
+        (combined_pattern, kinds) where kinds maps group name to
+        (element_type, line_based, first_inner_group, inner_group_count),
+        or None if the language has no comment patterns
+    """
+    names = [name for name in _ALTERNATION_ORDER if name in patterns]
+    if not names:
+        return None
+
+    parts = []
+    for name in names:
+        sub = patterns[name]
+        flags = ('s' if sub.flags & re.DOTALL else '') + ('m' if sub.flags & re.MULTILINE else '')
+        body = f'(?{flags}:{sub.pattern})' if flags else sub.pattern
+        parts.append(f'(?P<{name}>{body})')
+    if skip_pattern is not None:
+        parts.append(f'(?P<skip>{skip_pattern})')
+    combined = _compile('|'.join(parts))
+
+    kinds = {
+        name: (
+            ElementType.DOCSTRING if 'doc' in name else ElementType.COMMENT,
+            name == 'line_comment',
+            combined.groupindex[name] + 1,
+            patterns[name].groups,
+        )
+        for name in names
+    }
+    return combined, kinds
+
+
+def _compile(pattern: str) -> re.Pattern:
+    """Compile with the optional fast engine, falling back to re for unsupported syntax."""
+    try:
+        return _re_engine.compile(pattern)
+    except (re.error, _re_engine.error):
+        return re.compile(pattern)
+
+
+# Per-language fused comment scanners, built once at import
+_COMMENT_SCANNERS = {
+    language: _build_comment_scanner(patterns, _STRING_SKIP_PATTERNS.get(language))
+    for language, patterns in CodeParser.PATTERNS.items()
+}
+
+_STRING_PATTERNS: dict[str, re.Pattern] = {
+    language: _compile(patterns['string'].pattern)
+    for language, patterns in CodeParser.PATTERNS.items()
+    if 'string' in patterns
+}
@@ -1,320 +1,466 @@
 """File processing logic for translating codebases."""
 
+import asyncio
+import multiprocessing
 import os
-import threading
+import sys
+import tempfile
+import textwrap
+from concurrent.futures import Executor, ProcessPoolExecutor
 from pathlib import Path
-from typing import Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional, Union
 from dataclasses import dataclass, field
 
 from .parser import CodeParser, CodeElement, ElementType
-from .translator import LocalTranslator
+from .walker import iter_source_files
 
+if TYPE_CHECKING:
+    from .translator import LocalTranslator, TranslationResult
 
-@dataclass
+# Status lines buffered before each write to stdout
+_OUTPUT_FLUSH_LINES = 64
+
+# False on free-threaded builds (python3.13t+), where parse threads already run in parallel
+_GIL_ENABLED = getattr(sys, '_is_gil_enabled', lambda: True)()
+
+
+@dataclass(slots=True)
 class ProcessingStats:
-    """Thread-safe statistics from processing."""
+    """
+    Statistics from processing.
+
+    Not locked: concurrent work records into its own instance and the
+    results are combined with merge() on a single thread.
+    """
     files_scanned: int = 0
     files_with_foreign_text: int = 0
     files_translated: int = 0
     elements_translated: int = 0
     files_skipped: int = 0
     errors: list[str] = field(default_factory=list)
-    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
 
     def increment_scanned(self):
-        """Thread-safe increment of scanned files."""
-        with self._lock:
-            self.files_scanned += 1
+        """Increment scanned files."""
+        self.files_scanned += 1
 
     def increment_with_foreign_text(self):
-        """Thread-safe increment of files with foreign text."""
-        with self._lock:
-            self.files_with_foreign_text += 1
+        """Increment files with foreign text."""
+        self.files_with_foreign_text += 1
 
     def increment_translated(self):
-        """Thread-safe increment of translated files."""
-        with self._lock:
-            self.files_translated += 1
+        """Increment translated files."""
+        self.files_translated += 1
 
     def increment_elements_translated(self, count: int = 1):
-        """Thread-safe increment of translated elements."""
-        with self._lock:
-            self.elements_translated += count
+        """Increment translated elements."""
+        self.elements_translated += count
 
     def increment_skipped(self):
-        """Thread-safe increment of skipped files."""
-        with self._lock:
-            self.files_skipped += 1
+        """Increment skipped files."""
+        self.files_skipped += 1
 
     def add_error(self, error: str):
-        """Thread-safe error logging."""
-        with self._lock:
-            self.errors.append(error)
+        """Record an error message."""
+        self.errors.append(error)
+
+    def merge(self, other: 'ProcessingStats') -> None:
+        """Add another instance's counts and errors into this one."""
+        self.files_scanned += other.files_scanned
+        self.files_with_foreign_text += other.files_with_foreign_text
+        self.files_translated += other.files_translated
+        self.elements_translated += other.elements_translated
+        self.files_skipped += other.files_skipped
+        self.errors.extend(other.errors)
 
 
 class FileProcessor:
     """Process files for translation."""
 
-    # Skip these directories
-    SKIP_DIRS = {'.git', '.svn', '.hg', '__pycache__', 'node_modules', 'venv', '.venv', 'dist', 'build'}
+    # Default directories to skip
+    SKIP_DIRS = frozenset({
+        '.git', '.svn', '.hg', '__pycache__', 'node_modules', 'venv', '.venv', 'dist', 'build',
+    })
 
-    # Skip these file extensions
-    SKIP_EXTENSIONS = {
+    # Default file extensions to skip
+    SKIP_EXTENSIONS = frozenset({
         '.pyc', '.pyo', '.so', '.dll', '.exe', '.bin', '.obj',
         '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.ico', '.svg',
         '.mp3', '.mp4', '.avi', '.mov', '.wav',
         '.zip', '.tar', '.gz', '.rar', '.7z',
         '.pdf', '.doc', '.docx',
-    }
+    })
+
+    # Plain-dict snapshot of the parser's read-only extension map, so the
+    # per-file lookup skips the mappingproxy indirection
+    _EXT_TO_LANG: dict[str, str] = dict(CodeParser.LANGUAGE_EXTENSIONS)
+
+    # Runs with at least this many files parse in worker processes when
+    # parse_processes is left at None
+    PROCESS_POOL_MIN_FILES = 256
+
+    # Cross-file translation batches: dispatch at this many texts, or after
+    # this many seconds of waiting for more
+    BATCH_ITEMS = 16
+    BATCH_DELAY = 0.2
 
     def __init__(
         self,
-        translator: LocalTranslator,
+        translator: 'LocalTranslator',
         translate_all: bool = False,
         dry_run: bool = False,
         max_workers: int = 4,
+        skip_dirs: Optional[frozenset[str]] = None,
+        skip_extensions: Optional[frozenset[str]] = None,
+        parse_processes: Optional[int] = None,
     ):
         self.translator = translator
+        # None: worker processes for large runs only; 0: always threads
+        self.parse_processes = parse_processes
         self.translate_all = translate_all
         self.dry_run = dry_run
         self.max_workers = max_workers
+        self.skip_dirs = self.SKIP_DIRS if skip_dirs is None else frozenset(skip_dirs)
+        self.skip_extensions = (
+            self.SKIP_EXTENSIONS if skip_extensions is None else frozenset(skip_extensions)
+        )
         self.stats = ProcessingStats()
 
-    def should_skip_file(self, file_path: Path) -> tuple[bool, Optional[str]]:
+    @staticmethod
+    def _ext(name: str) -> str:
+        """Lowercased extension of a file name, with the same rules as os.path.splitext."""
+        i = name.rfind('.')
+        # A leading dot (".gitignore") marks a hidden file, not an extension
+        if i <= 0 or not name[:i].strip('.'):
+            return ''
+        return name[i:].lower()
+
+    def should_skip_file(self, file_path: Union[Path, os.DirEntry]) -> tuple[bool, Optional[str]]:
         """
         Check if file should be skipped.
 
+        Accepts a DirEntry from the directory walk so its cached name and
+        stat result are reused instead of re-parsing a Path.
+
         Returns:
             (should_skip, reason)
         """
+        should_skip, reason, _ = self._check_file(file_path)
+        return should_skip, reason
+
+    def _check_file(
+        self, file_path: Union[Path, os.DirEntry]
+    ) -> tuple[bool, Optional[str], Optional[str]]:
+        """
+        Run the skip checks and detect the language in one pass.
+
+        Returns:
+            (should_skip, reason, language)
+        """
+        suffix = self._ext(file_path.name)
+
         # Check extension
-        if file_path.suffix.lower() in self.SKIP_EXTENSIONS:
-            return True, "binary/media file"
+        if suffix in self.skip_extensions:
+            return True, "binary/media file", None
 
         # Check if we support the language
-        if not CodeParser.detect_language(file_path):
-            return True, "unsupported file type"
+        language = self._EXT_TO_LANG.get(suffix)
+        if not language:
+            return True, "unsupported file type", None
 
         # Check file size (skip very large files > 1MB)
         try:
             if file_path.stat().st_size > 1024 * 1024:
-                return True, "file too large (>1MB)"
+                return True, "file too large (>1MB)", language
         except OSError:
-            return True, "cannot stat file"
+            return True, "cannot stat file", language
 
-        return False, None
+        return False, None, language
 
-    def process_file(self, file_path: Path) -> Optional[dict]:
+    def _prepare_file(
+        self,
+        file_path: Union[Path, os.DirEntry],
+        stats: Optional[ProcessingStats] = None,
+    ) -> Optional[tuple[str, list[CodeElement]]]:
         """
-        Process a single file.
+        Read a file and extract its translatable elements.
+
+        Args:
+            file_path: File to read
+            stats: Where to record counts (defaults to self.stats)
 
         Returns:
-            Dictionary with processing results, or None if skipped
+            (content, elements), or None if the file is skipped or has no foreign text
         """
-        self.stats.increment_scanned()
-
-        # Check if should skip
-        should_skip, reason = self.should_skip_file(file_path)
-        if should_skip:
-            self.stats.increment_skipped()
-            return None
-
-        # Check file size before reading
-        max_size_bytes = 1 * 1024 * 1024  # 1MB
-        if file_path.stat().st_size > max_size_bytes:
-            self.stats.files_skipped += 1
-            self.stats.errors.append(f"{file_path}: File too large to process (>1MB)")
+        stats = self.stats if stats is None else stats
+        language = self._admit_file(file_path, stats)
+        if language is None:
             return None
         try:
-            # Read file
-            content = file_path.read_text(encoding='utf-8')
+            parsed = CodeParser.read_and_extract(
+                os.fspath(file_path), language, self.translate_all
+            )
         except (UnicodeDecodeError, OSError) as e:
-            self.stats.increment_skipped()
-            self.stats.add_error(f"{file_path}: {e}")
-            return None
+            return self._record_parsed(file_path, stats, None, e)
+        return self._record_parsed(file_path, stats, parsed)
 
-        # Detect language
-        language = CodeParser.detect_language(file_path)
-        if not language:
-            self.stats.increment_skipped()
+    async def _prepare_file_in_pool(
+        self,
+        pool: Executor,
+        file_path: Union[Path, os.DirEntry],
+        stats: ProcessingStats,
+    ) -> Optional[tuple[str, list[CodeElement]]]:
+        """Like _prepare_file, but reading and parsing run in the given process pool."""
+        language = self._admit_file(file_path, stats)
+        if language is None:
             return None
+        try:
+            parsed = await asyncio.get_running_loop().run_in_executor(
+                pool, CodeParser.read_and_extract, os.fspath(file_path), language, self.translate_all
+            )
+        except (UnicodeDecodeError, OSError) as e:
+            return self._record_parsed(file_path, stats, None, e)
+        return self._record_parsed(file_path, stats, parsed)
 
-        # Extract translatable elements
-        if self.translate_all:
-            elements = CodeParser.extract_all_translatable(content, language)
-        else:
-            elements = CodeParser.extract_comments_and_docstrings(content, language)
+    def _admit_file(
+        self, file_path: Union[Path, os.DirEntry], stats: ProcessingStats
+    ) -> Optional[str]:
+        """Count a scanned file and run the skip checks, returning its language if kept."""
+        stats.increment_scanned()
 
-        if not elements:
+        should_skip, reason, language = self._check_file(file_path)
+        if should_skip:
+            stats.increment_skipped()
             return None
+        return language
 
-        self.stats.increment_with_foreign_text()
+    def _record_parsed(
+        self,
+        file_path: Union[Path, os.DirEntry],
+        stats: ProcessingStats,
+        parsed: Optional[tuple[str, list[CodeElement]]],
+        error: Optional[Exception] = None,
+    ) -> Optional[tuple[str, list[CodeElement]]]:
+        """Update stats for a parse outcome and pass it through."""
+        if error is not None:
+            stats.increment_skipped()
+            stats.add_error(f"{os.fspath(file_path)}: {error}")
+            return None
+        if parsed is not None:
+            stats.increment_with_foreign_text()
+        return parsed
+
+    @staticmethod
+    def _dedupe_requests(
+        elements: list[CodeElement],
+    ) -> tuple[list[tuple[str, str]], list[int]]:
+        """
+        Collapse repeated element texts into one translation request each.
 
-        # Translate elements with error tracking
+        Returns:
+            (requests, slots) where requests holds unique (text, context)
+            pairs and slots[i] is the index of elements[i]'s request
+        """
+        positions: dict[str, int] = {}
+        requests = []
+        slots = []
+        for element in elements:
+            slot = positions.get(element.text)
+            if slot is None:
+                slot = positions[element.text] = len(requests)
+                requests.append((element.text, element.type.value))
+            slots.append(slot)
+        return requests, slots
+
+    def _pair_translations(
+        self,
+        file_path: Path,
+        elements: list[CodeElement],
+        results: list['TranslationResult'],
+        stats: Optional[ProcessingStats] = None,
+    ) -> list[tuple[CodeElement, str]]:
+        """Pair elements with their translations, logging failures to stats (default self.stats)."""
+        stats = self.stats if stats is None else stats
         translated_elements = []
         translation_failures = 0
 
-        for element in elements:
-            context = element.type.value
-            result = self.translator.translate_with_result(element.text, context)
-
+        for element, result in zip(elements, results):
             if result.success:
                 translated_elements.append((element, result.text))
             else:
                 # Translation failed - use original text and log error
                 translated_elements.append((element, element.text))
                 translation_failures += 1
-                self.stats.add_error(
+                stats.add_error(
                     f"{file_path} [{element.type.value} at line {element.start_line}]: {result.error}"
                 )
 
-        self.stats.increment_elements_translated(len(translated_elements) - translation_failures)
+        stats.increment_elements_translated(len(translated_elements) - translation_failures)
+        return translated_elements
 
-        # Reconstruct file
+    def _finish_file(
+        self,
+        file_path: Path,
+        content: str,
+        translated_elements: list[tuple[CodeElement, str]],
+        stats: Optional[ProcessingStats] = None,
+    ) -> Optional[dict]:
+        """Reconstruct a file from its translations and write it back, counting into stats."""
+        stats = self.stats if stats is None else stats
         new_content = self._reconstruct_file(content, translated_elements)
 
-        # Write back if not dry run
-        if not self.dry_run:
+        # Write back if not dry run and something actually changed
+        if not self.dry_run and new_content != content:
             try:
-                file_path.write_text(new_content, encoding='utf-8')
-                self.stats.increment_translated()
+                _atomic_write(file_path, new_content.encode('utf-8'))
+                stats.increment_translated()
             except OSError as e:
-                self.stats.add_error(f"{file_path}: Failed to write - {e}")
+                stats.add_error(f"{file_path}: Failed to write - {e}")
                 return None
 
         return {
             'file': file_path,
-            'elements_count': len(elements),
+            'elements_count': len(translated_elements),
             'original_size': len(content),
             'new_size': len(new_content),
         }
 
+    def process_file(self, file_path: Path) -> Optional[dict]:
+        """
+        Process a single file.
+
+        Returns:
+            Dictionary with processing results, or None if skipped
+        """
+        prepared = self._prepare_file(file_path)
+        if prepared is None:
+            return None
+        content, elements = prepared
+
+        requests, slots = self._dedupe_requests(elements)
+        unique_results = self.translator.translate_batch_with_result(requests)
+        results = [unique_results[slot] for slot in slots]
+        translated_elements = self._pair_translations(file_path, elements, results)
+
+        return self._finish_file(file_path, content, translated_elements)
+
+    async def process_file_async(
+        self,
+        file_path: Union[Path, os.DirEntry],
+        semaphore: asyncio.Semaphore,
+    ) -> Optional[dict]:
+        """
+        Process a single file, overlapping its translation requests.
+
+        Reading, parsing and writing run in worker threads. Elements are
+        translated in fused batches, with at most semaphore's worth of
+        requests in flight at once.
+
+        Returns:
+            Dictionary with processing results, or None if skipped
+        """
+        return await self._process_file_async(
+            file_path,
+            lambda requests: self.translator.translate_batch_with_result_async(requests, semaphore),
+        )
+
+    async def _process_file_async(
+        self,
+        file_path: Union[Path, os.DirEntry],
+        translate: Callable[[list[tuple[str, str]]], Awaitable[list['TranslationResult']]],
+        parse_pool: Optional[Executor] = None,
+    ) -> Optional[dict]:
+        """
+        Prepare, translate (via the given coroutine function) and finish one file.
+
+        Parsing runs in parse_pool if given, otherwise in a worker thread.
+        Counts go to a stats object private to this file, merged into
+        self.stats on the event loop thread once the file is done, so
+        worker threads never share counters.
+        """
+        stats = ProcessingStats()
+        try:
+            if parse_pool is None:
+                prepared = await asyncio.to_thread(self._prepare_file, file_path, stats)
+            else:
+                prepared = await self._prepare_file_in_pool(parse_pool, file_path, stats)
+            if prepared is None:
+                return None
+            content, elements = prepared
+
+            requests, slots = self._dedupe_requests(elements)
+            unique_results = await translate(requests)
+            results = [unique_results[slot] for slot in slots]
+            file_path = Path(file_path)
+            translated_elements = self._pair_translations(file_path, elements, results, stats)
+
+            return await asyncio.to_thread(
+                self._finish_file, file_path, content, translated_elements, stats
+            )
+        finally:
+            self.stats.merge(stats)
+
     def _reconstruct_file(
         self,
         original_content: str,
         translated_elements: list[tuple[CodeElement, str]]
     ) -> str:
         """
-        Reconstruct file with translated elements using position-aware replacement.
-        """
-        lines = original_content.split('\n')
-
-        # Sort elements by line number in reverse to avoid offset issues
-        sorted_elements = sorted(translated_elements, key=lambda x: x[0].start_line, reverse=True)
-
-        for element, translation in sorted_elements:
-            if element.type == ElementType.COMMENT:
-                # Position-aware comment replacement using start_col
-                line_idx = element.start_line
-                if line_idx < len(lines):
-                    line = lines[line_idx]
-                    # Use the element's start_col to find the actual comment marker
-                    # This handles cases where the comment text itself contains # or //
-                    comment_start = element.start_col
-
-                    # Find the comment marker (# or //) at or near start_col
-                    if comment_start < len(line):
-                        if line[comment_start:comment_start+2] == '//':
-                            prefix = line[:comment_start + 2]
-                            lines[line_idx] = f"{prefix} {translation}"
-                        elif line[comment_start] == '#':
-                            prefix = line[:comment_start + 1]
-                            lines[line_idx] = f"{prefix} {translation}"
-                        else:
-                            # Fallback: try to find marker near start_col
-                            if '#' in line[max(0, comment_start-2):comment_start+3]:
-                                idx = line.rfind('#', 0, comment_start+3)
-                                prefix = line[:idx + 1]
-                                lines[line_idx] = f"{prefix} {translation}"
-                            elif '//' in line[max(0, comment_start-2):comment_start+4]:
-                                idx = line.rfind('//', 0, comment_start+4)
-                                prefix = line[:idx + 2]
-                                lines[line_idx] = f"{prefix} {translation}"
-
-            elif element.type == ElementType.DOCSTRING:
-                # Preserve original docstring delimiters and indentation
-                start_line = element.start_line
-                end_line = element.end_line
-
-                if start_line < len(lines):
-                    original_start_line = lines[start_line]
-
-                    # Detect quote style and indentation
-                    quote_style = '"""'
-                    if "'''" in original_start_line:
-                        quote_style = "'''"
-                    elif '"""' in original_start_line:
-                        quote_style = '"""'
-
-                    # Detect indentation from original line
-                    indent = len(original_start_line) - len(original_start_line.lstrip())
-                    indent_str = original_start_line[:indent]
-
-                    if start_line == end_line:
-                        # Single line docstring - preserve style and indentation
-                        lines[start_line] = f'{indent_str}{quote_style}{translation}{quote_style}'
-                    else:
-                        # Multi-line docstring - preserve quote style and indentation
-                        translated_lines = translation.split('\n')
-
-                        # Extract prefix before opening quotes
-                        prefix = original_start_line[:original_start_line.find(quote_style)]
-
-                        lines[start_line:end_line+1] = [
-                            f'{prefix}{quote_style}',
-                            *[f'{indent_str}{line}' if line.strip() else '' for line in translated_lines],
-                            f'{indent_str}{quote_style}'
-                        ]
-
-            elif element.type == ElementType.STRING_LITERAL:
-                # Position-aware string replacement using start_col and end_col
-                line_idx = element.start_line
-                if line_idx < len(lines):
-                    line = lines[line_idx]
-                    # Only replace at the specific position, not all occurrences
-                    if hasattr(element, 'start_col') and hasattr(element, 'end_col'):
-                        # Slice and reconstruct to replace only the specific occurrence
-                        before = line[:element.start_col]
-                        after = line[element.end_col:]
-                        # Preserve the quote character
-                        quote_char = line[element.start_col] if element.start_col < len(line) else '"'
-                        lines[line_idx] = f'{before}{quote_char}{translation}{quote_char}{after}'
-                    else:
-                        # Fallback: replace only first occurrence
-                        lines[line_idx] = line.replace(element.text, translation, 1)
-
-        return '\n'.join(lines)
+        Reconstruct file with translated elements spliced in by offset.
 
-    def process_directory(
+        Each element's offsets cover just its text, so comment markers, quotes
+        and surrounding code are copied through untouched in a single pass.
+        """
+        if not translated_elements:
+            return original_content
+
+        if len(translated_elements) == 1:
+            element, translation = translated_elements[0]
+            if element.start_offset < 0:
+                return original_content
+            return (
+                original_content[:element.start_offset]
+                + _format_replacement(original_content, element, translation)
+                + original_content[element.end_offset:]
+            )
+
+        out = []
+        cursor = 0
+
+        for element, translation in sorted(translated_elements, key=lambda x: x[0].start_offset):
+            # Skip elements without offsets or overlapping one already replaced
+            if element.start_offset < cursor:
+                continue
+            out.append(original_content[cursor:element.start_offset])
+            out.append(_format_replacement(original_content, element, translation))
+            cursor = element.end_offset
+
+        out.append(original_content[cursor:])
+        return ''.join(out)
+
+    async def process_directory_async(
         self,
         directory: Path,
         recursive: bool = True,
-        file_patterns: Optional[list[str]] = None
+        file_patterns: Optional[list[str]] = None,
+        on_progress: Optional[Callable[[int, int], None]] = None,
     ) -> ProcessingStats:
         """
-        Process all files in a directory.
+        Process all files in a directory from within a running event loop.
 
         Args:
             directory: Root directory to process
             recursive: Whether to recurse into subdirectories
             file_patterns: Optional list of glob patterns to match
+            on_progress: Optional callback receiving (completed, total) after each file
 
         Returns:
             Processing statistics
         """
-        files_to_process = []
-
-        if recursive:
-            for root, dirs, files in os.walk(directory):
-                # Remove skip dirs
-                dirs[:] = [d for d in dirs if d not in self.SKIP_DIRS]
-
-                for file in files:
-                    file_path = Path(root) / file
-                    files_to_process.append(file_path)
-        else:
-            files_to_process = list(directory.glob('*'))
+        # Skip dirs are pruned during the walk; extensions are left to
+        # should_skip_file so skipped files still show up in the stats
+        files_to_process: list[Union[Path, os.DirEntry]] = list(
+            iter_source_files(directory, skip_dirs=self.skip_dirs, recursive=recursive)
+        )
 
         # Filter by patterns if provided
         if file_patterns:
@@ -323,23 +469,288 @@ class FileProcessor:
                 filtered.extend(directory.glob(pattern))
             files_to_process = filtered
 
-        # Process files in parallel
+        # Process files concurrently
         print(f"Processing {len(files_to_process)} files...")
-
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            futures = {
-                executor.submit(self.process_file, file_path): file_path
-                for file_path in files_to_process
-            }
-
-            for future in as_completed(futures):
-                file_path = futures[future]
-                try:
-                    result = future.result()
-                    if result:
-                        print(f"✓ {file_path}: {result['elements_count']} elements translated")
-                except Exception as e:
-                    self.stats.errors.append(f"{file_path}: {e}")
-                    print(f"✗ {file_path}: {e}")
+        await self._process_files_async(files_to_process, on_progress)
 
         return self.stats
+
+    def process_directory(
+        self,
+        directory: Path,
+        recursive: bool = True,
+        file_patterns: Optional[list[str]] = None,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+    ) -> ProcessingStats:
+        """
+        Process all files in a directory.
+
+        Args:
+            directory: Root directory to process
+            recursive: Whether to recurse into subdirectories
+            file_patterns: Optional list of glob patterns to match
+            on_progress: Optional callback receiving (completed, total) after each file
+
+        Returns:
+            Processing statistics
+        """
+        return asyncio.run(
+            self.process_directory_async(directory, recursive, file_patterns, on_progress)
+        )
+
+    async def _process_files_async(
+        self,
+        files_to_process: list[Union[Path, os.DirEntry]],
+        on_progress: Optional[Callable[[int, int], None]] = None,
+    ) -> None:
+        """
+        Process files on one event loop with max_workers translations in flight.
+
+        Files are read and parsed in worker threads, their texts are pooled
+        into cross-file batches by a single _TranslationBatcher, and finished
+        files are written back in worker threads. At most 4 * max_workers
+        files are open at once; the next file is only started when one
+        finishes, so memory stays flat on huge trees.
+        """
+        # Files started but not yet at the translation stage; while none are
+        # left, no more requests can arrive and batches go out immediately
+        preparing = 0
+        batcher = _TranslationBatcher(
+            self.translator,
+            asyncio.Semaphore(self.max_workers),
+            self.BATCH_ITEMS,
+            self.BATCH_DELAY,
+            more_expected=lambda: preparing > 0,
+        )
+        batcher_task = asyncio.create_task(batcher.run())
+        parse_pool = self._make_parse_pool(len(files_to_process))
+        window = 4 * self.max_workers
+        total = len(files_to_process)
+        completed = 0
+
+        # Per-file status lines are written in blocks rather than one
+        # print() per file
+        output: list[str] = []
+
+        def flush_output() -> None:
+            if output:
+                sys.stdout.write('\n'.join(output) + '\n')
+                output.clear()
+
+        async def run(entry: Union[Path, os.DirEntry]) -> None:
+            nonlocal completed, preparing
+            translating = False
+
+            async def translate(requests: list[tuple[str, str]]) -> list['TranslationResult']:
+                nonlocal preparing, translating
+                translating = True
+                preparing -= 1
+                return await batcher.translate(requests)
+
+            try:
+                result = await self._process_file_async(entry, translate, parse_pool)
+                if result:
+                    output.append(f"✓ {result['file']}: {result['elements_count']} elements translated")
+            except Exception as e:
+                self.stats.errors.append(f"{os.fspath(entry)}: {e}")
+                output.append(f"✗ {os.fspath(entry)}: {e}")
+            if not translating:
+                preparing -= 1
+                batcher.wake()
+            if len(output) >= _OUTPUT_FLUSH_LINES:
+                flush_output()
+            completed += 1
+            if on_progress:
+                on_progress(completed, total)
+
+        in_flight: set[asyncio.Task] = set()
+        for file_path in files_to_process:
+            if len(in_flight) >= window:
+                _, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            preparing += 1
+            in_flight.add(asyncio.create_task(run(file_path)))
+
+        if in_flight:
+            await asyncio.wait(in_flight)
+        batcher_task.cancel()
+        # Its connections belong to this loop and can't outlive it
+        await self.translator.aclose()
+        if parse_pool is not None:
+            await asyncio.to_thread(parse_pool.shutdown)
+        flush_output()
+
+    def _make_parse_pool(self, file_count: int) -> Optional[ProcessPoolExecutor]:
+        """
+        Start a process pool for parsing, or return None to parse in threads.
+
+        Regex scanning holds the GIL, so worker processes are the only way to
+        parse files in parallel. They cost a fork/spawn each, so by default
+        they are only used for runs of at least PROCESS_POOL_MIN_FILES files,
+        and not at all on free-threaded builds.
+        """
+        processes = self.parse_processes
+        if processes is None:
+            if not _GIL_ENABLED or file_count < self.PROCESS_POOL_MIN_FILES:
+                return None
+            processes = os.cpu_count() or 1
+            if processes < 2:
+                return None
+        if processes <= 0:
+            return None
+
+        # The event loop already runs worker threads, which makes a plain
+        # fork() unsafe; forkserver/spawn start children from a clean state
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        return ProcessPoolExecutor(max_workers=processes, mp_context=context)
+
+
+class _TranslationBatcher:
+    """Pool translation requests from many files into shared batches."""
+
+    def __init__(
+        self,
+        translator: 'LocalTranslator',
+        semaphore: asyncio.Semaphore,
+        max_items: int,
+        max_delay: float,
+        more_expected: Callable[[], bool] = lambda: True,
+    ):
+        self.translator = translator
+        self.semaphore = semaphore
+        self.max_items = max_items
+        self.max_delay = max_delay
+        self.more_expected = more_expected
+        # None entries only wake run() so it can re-check more_expected
+        self._queue: asyncio.Queue[Optional[tuple[tuple[str, str], asyncio.Future]]] = (
+            asyncio.Queue()
+        )
+        self._dispatches: set[asyncio.Task] = set()
+
+    def wake(self) -> None:
+        """Let a waiting batch re-check whether more requests are coming."""
+        self._queue.put_nowait(None)
+
+    async def translate(self, requests: list[tuple[str, str]]) -> list['TranslationResult']:
+        """Queue requests for the next batches and wait for their results."""
+        loop = asyncio.get_running_loop()
+        futures = []
+        for request in requests:
+            future = loop.create_future()
+            self._queue.put_nowait((request, future))
+            futures.append(future)
+        return list(await asyncio.gather(*futures))
+
+    async def run(self) -> None:
+        """
+        Dispatch batches until cancelled.
+
+        A batch goes out once it holds max_items requests, max_delay seconds
+        after its first request arrived, or as soon as more_expected() says
+        no further requests can arrive, whichever comes first.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                continue
+            batch = [item]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_items:
+                if not self._queue.empty():
+                    item = self._queue.get_nowait()
+                elif not self.more_expected():
+                    break
+                else:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is not None:
+                    batch.append(item)
+
+            task = asyncio.create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch: list[tuple[tuple[str, str], asyncio.Future]]) -> None:
+        """Translate one batch and resolve each request's future."""
+        try:
+            results = await self.translator.translate_batch_with_result_async(
+                [request for request, _ in batch], self.semaphore
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+def _format_replacement(content: str, element: CodeElement, translation: str) -> str:
+    """
+    Fit a translation into the span its element's text occupied.
+
+    Comments and strings that sat on one line can't take a newline, so any
+    the model adds are folded into spaces. Multi-line text gets the
+    continuation-line indentation (including any ' * ' gutter) of the original.
+    """
+    if '\n' not in translation:
+        return translation
+
+    if element.start_line == element.end_line and element.type != ElementType.DOCSTRING:
+        return ' '.join(part.strip() for part in translation.split('\n') if part.strip())
+
+    original_rest = [line for line in element.text.split('\n')[1:] if line.strip()]
+    if original_rest:
+        indent = os.path.commonprefix(
+            [line[:len(line) - len(line.lstrip())] for line in original_rest]
+        )
+    else:
+        line_start = content.rfind('\n', 0, element.start_offset) + 1
+        line = content[line_start:element.start_offset]
+        indent = line[:len(line) - len(line.lstrip())]
+
+    first, rest = translation.split('\n', 1)
+    return '\n'.join([
+        first,
+        *(indent + line if line.strip() else '' for line in textwrap.dedent(rest).split('\n')),
+    ])
+
+
+def _atomic_write(file_path: Path, data: bytes) -> None:
+    """
+    Replace file_path's contents with data in one step.
+
+    The bytes go to a sibling temp file with the original permissions, which
+    is then renamed over the target, so readers never see a partial file.
+    Symlinks are resolved first so the rename replaces the file they point
+    to rather than the link itself.
+    """
+    file_path = Path(file_path).resolve()
+    mode = file_path.stat().st_mode & 0o7777
+    # A unique name, so concurrent runs never share or clobber a temp file
+    fd, tmp_path = tempfile.mkstemp(
+        dir=file_path.parent, prefix=f".{file_path.name}.", suffix=".tmp"
+    )
+    try:
+        os.fchmod(fd, mode)
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    except BaseException:
+        os.close(fd)
+        os.unlink(tmp_path)
+        raise
+    os.close(fd)
+    try:
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
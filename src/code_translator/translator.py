@@ -1,12 +1,43 @@
 """Ollama-based translation engine."""
 
+import asyncio
+import functools
+import json
+import re
+import threading
 import ollama
+from pathlib import Path
 from typing import Optional
 from dataclasses import dataclass, field
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from .cache import TranslationCache
 
-@dataclass
+
+# Characters that must appear for a text to be worth sending, by source language.
+# Languages not listed here are always sent.
+_SOURCE_SCRIPTS = {
+    "chinese": re.compile('[\u4e00-\u9fff\u3400-\u4dbf\u3000-\u303f\uff00-\uffef]'),
+    "japanese": re.compile('[\u3040-\u30ff\u4e00-\u9fff\u3400-\u4dbf\uff00-\uffef]'),
+    "korean": re.compile('[\uac00-\ud7af\u1100-\u11ff\u3130-\u318f]'),
+    "russian": re.compile('[\u0400-\u04ff]'),
+}
+
+# Ollama library tags of the form name:size[-instruct][-qN_x], e.g. qwen2.5:1.5b-instruct-q4_0
+_MODEL_TAG_RE = re.compile(r'(?P<base>[^:]+:\d+(?:\.\d+)?[bm])(?:-instruct)?(?:-q\d\w*)?', re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=32)
+def _ensure_model(model: str) -> None:
+    """Make sure model exists locally, pulling it if not. Once per model per process."""
+    try:
+        ollama.show(model)
+    except ollama.ResponseError:
+        print(f"Model {model} not found locally. Pulling...")
+        ollama.pull(model)
+        print(f"Successfully pulled {model}")
+
+
+@dataclass(slots=True)
 class TranslationConfig:
     """Configuration for translation."""
     model: str = "qwen2.5:1.5b"
@@ -15,9 +46,31 @@ class TranslationConfig:
     temperature: float = 0.3  # 0.3 provides a good balance between consistency and translation quality for translation tasks. Lower values make output more deterministic; higher values increase creativity but may reduce accuracy.
     max_text_length: int = 10000  # Maximum characters per translation
     max_num_predict: int = 4096  # Cap output tokens to prevent API issues
-
-
-@dataclass
+    batch_size: int = 16  # Maximum texts fused into one batched request
+    keep_alive: str = "1h"  # How long Ollama keeps the model loaded after the last request
+    cache_size: int = 4096  # Translations kept in memory
+    cache_path: Optional[str] = None  # SQLite file to persist translations across runs
+    # CPU threads per request; None keeps Ollama's default of one per physical core.
+    # Must stay the same for every request, or Ollama reloads the model.
+    num_thread: Optional[int] = None
+    # Weight quantization tag such as "q4_0" or "q8_0"; None uses the model's default
+    # (usually q4_K_M). Smaller weights decode faster since decoding is memory-bound.
+    quantization: Optional[str] = None
+
+    def __post_init__(self):
+        if self.quantization:
+            # Only rewrite tags we recognise; anything else is used as given
+            match = _MODEL_TAG_RE.fullmatch(self.model)
+            if match:
+                self.model = f"{match['base']}-instruct-{self.quantization}"
+            else:
+                print(
+                    f"Warning: Can't apply quantization {self.quantization!r} to model "
+                    f"{self.model!r}; expected a tag like qwen2.5:1.5b. Using it as given."
+                )
+
+
+@dataclass(slots=True, frozen=True)
 class TranslationResult:
     """Result of a translation attempt."""
     text: str
@@ -30,16 +83,159 @@ class LocalTranslator:
 
     def __init__(self, config: TranslationConfig):
         self.config = config
+        # One AsyncClient per event loop, since its connections can't cross loops
+        self._async_clients: dict[asyncio.AbstractEventLoop, ollama.AsyncClient] = {}
+        # Private loop for sync batch calls, kept so its AsyncClient's connections are too
+        self._batch_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._batch_lock = threading.Lock()
+        # Fixed across every request so Ollama can reuse the encoded prefix
+        self._system = (
+            f"You translate {config.source_lang} text from source code to {config.target_lang}. "
+            f"Preserve all formatting, line breaks, and special characters. "
+            f"Output only the translation."
+        )
+        self._system_message = {"role": "system", "content": self._system}
+        self._source_script = _SOURCE_SCRIPTS.get(config.source_lang.lower())
+        self._cache = TranslationCache(
+            Path(config.cache_path).expanduser() if config.cache_path else None,
+            maxsize=config.cache_size,
+        )
         self._verify_model()
 
+    def close(self) -> None:
+        """Close HTTP connections and flush the translation cache to disk."""
+        with self._batch_lock:
+            if self._batch_loop is not None:
+                self._batch_loop.run_until_complete(self.aclose())
+                self._batch_loop.close()
+                self._batch_loop = None
+        self._cache.close()
+
+    async def aclose(self) -> None:
+        """Close the AsyncClient bound to the running event loop, if there is one."""
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+
     def _verify_model(self) -> None:
         """Check if the model is available, pull if not."""
+        _ensure_model(self.config.model)
+
+        # Load the model and prefill the system prompt now, so the first file
+        # pays neither; keep_alive then holds both resident between files
         try:
-            ollama.show(self.config.model)
+            ollama.generate(
+                model=self.config.model,
+                system=self._system,
+                prompt=".",
+                keep_alive=self.config.keep_alive,
+                options=self._options(1),
+            )
         except ollama.ResponseError:
-            print(f"Model {self.config.model} not found locally. Pulling...")
-            ollama.pull(self.config.model)
-            print(f"Successfully pulled {self.config.model}")
+            pass
+
+    def _needs_translation(self, text: str) -> bool:
+        """Whether text contains anything in the source language's script."""
+        if not text.strip():
+            return False
+        if self._source_script is None:
+            return True
+        # Every listed script is non-ASCII, so plain ASCII skips the regex
+        return not text.isascii() and self._source_script.search(text) is not None
+
+    def _cache_key(self, text: str) -> bytes:
+        """Cache key for text under the current model and language pair."""
+        return TranslationCache.make_key(
+            self.config.model, self.config.source_lang, self.config.target_lang, text
+        )
+
+    def _build_messages(self, text: str) -> list[dict]:
+        """Build the chat messages for a single text."""
+        return [self._system_message, {"role": "user", "content": text}]
+
+    def _build_batch_messages(self, texts: list[str], context: Optional[str]) -> list[dict]:
+        """Build chat messages that translate several texts as a JSON array."""
+        kind = f"{context} " if context else ""
+        # format="json" constrains the reply to a JSON object, so the array is
+        # asked for under a key rather than bare
+        content = (
+            f"Translate each {kind}text in this JSON array. Reply with only a JSON "
+            f'object {{"translations": [...]}} holding {len(texts)} translated '
+            f"strings in the same order.\n"
+            f"{json.dumps(texts, ensure_ascii=False)}"
+        )
+        return [self._system_message, {"role": "user", "content": content}]
+
+    @staticmethod
+    def _parse_batch_response(response_text: str, expected: int) -> Optional[list[str]]:
+        """Parse a batched reply, returning None unless it has exactly `expected` strings."""
+        try:
+            reply = json.loads(response_text)
+        except ValueError:
+            return None
+        translations = reply.get("translations") if isinstance(reply, dict) else None
+        if (
+            not isinstance(translations, list)
+            or len(translations) != expected
+            or not all(isinstance(t, str) for t in translations)
+        ):
+            return None
+        return [t.strip() for t in translations]
+
+    def _plan_batches(
+        self,
+        texts: list[tuple[str, Optional[str]]],
+        results: list[Optional[TranslationResult]],
+    ) -> list[tuple[Optional[str], list[int]]]:
+        """
+        Group indices of translatable texts by context into batches.
+
+        Blank, untranslatable and cached texts are resolved in place in `results`; texts too long to
+        translate are left out of batches and handled individually.
+
+        Returns:
+            List of (context, indices) batches of at most batch_size items and
+            max_text_length // 2 characters (a lone longer text still batches alone)
+        """
+        open_batches: dict[Optional[str], list[int]] = {}
+        open_chars: dict[Optional[str], int] = {}
+        max_chars = self.config.max_text_length // 2
+        batches = []
+        for index, (text, context) in enumerate(texts):
+            if not self._needs_translation(text):
+                results[index] = TranslationResult(text=text, success=True)
+                continue
+            if len(text) > self.config.max_text_length:
+                continue
+            cached = self._cache.get(self._cache_key(text))
+            if cached is not None:
+                results[index] = TranslationResult(text=cached, success=True)
+                continue
+            batch = open_batches.get(context)
+            if (
+                batch is None
+                or len(batch) >= self.config.batch_size
+                # Long texts would blow the shared num_predict budget and truncate the array
+                or open_chars[context] + len(text) > max_chars
+            ):
+                batch = []
+                open_batches[context] = batch
+                open_chars[context] = 0
+                batches.append((context, batch))
+            batch.append(index)
+            open_chars[context] += len(text)
+        return batches
+
+    def _get_async_client(self) -> ollama.AsyncClient:
+        """Return an AsyncClient bound to the running event loop."""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            # Loops that ended without aclose() can no longer run their client's close
+            for stale in [l for l in self._async_clients if l.is_closed()]:
+                del self._async_clients[stale]
+            client = self._async_clients[loop] = ollama.AsyncClient()
+        return client
 
     def translate(self, text: str, context: Optional[str] = None) -> str:
         """
@@ -47,52 +243,55 @@ class LocalTranslator:
 
         Args:
             text: Text to translate (max self.config.max_text_length chars)
-            context: Optional context about what this text is (e.g., "Python comment", "docstring")
+            context: Optional context about what this text is (e.g., "Python comment", "docstring").
+                Only used to group batched requests; single texts share one system prompt.
 
         Returns:
             Translated text, or original text if translation fails
         """
-        if not text.strip():
+        if not self._needs_translation(text):
             return text
 
-        # Validate input length
         if len(text) > self.config.max_text_length:
             print(f"Warning: Text too long ({len(text)} chars), truncating to {self.config.max_text_length}")
-            text = text[:self.config.max_text_length]
-
-        # Build prompt
-        context_info = f" This is a {context}." if context else ""
-        prompt = (
-            f"Translate the following {self.config.source_lang} text to {self.config.target_lang}. "
-            f"Preserve all formatting, line breaks, and special characters.{context_info}\n\n"
-            f"Text to translate:\n{text}\n\n"
-            f"Translation:"
-        )
+            result = self.translate_with_result(text[:self.config.max_text_length], context)
+        else:
+            result = self.translate_with_result(text, context)
 
-        try:
-            # Cap num_predict to prevent excessive resource usage
-            # Estimate 2x input length, but cap at max_num_predict
-            num_predict = min(len(text) * 2, self.config.max_num_predict)
+        if not result.success:
+            print(f"Translation error for text '{text[:50]}...': {result.error}")
+            return text  # Return original on error
+        return result.text
 
-            response = ollama.generate(
-                model=self.config.model,
-                prompt=prompt,
-                options={
-                    "temperature": self.config.temperature,
-                    "num_predict": num_predict,
-                }
-            )
+    def translate_with_result(self, text: str, context: Optional[str] = None) -> TranslationResult:
+        """
+        Translate text and return detailed result with success/error info.
 
-            translation = response['response'].strip()
-            return translation
+        Args:
+            text: Text to translate
+            context: Optional context about what this text is
 
+        Returns:
+            TranslationResult with translated text and status
+        """
+        result = self._resolve_locally(text)
+        if result is not None:
+            return result
+        try:
+            response = ollama.chat(**self._chat_request(text))
+            return self._store_response(text, response)
         except Exception as e:
-            print(f"Translation error for text '{text[:50]}...': {e}")
-            return text  # Return original on error
+            return self._failed(text, e)
 
-    def translate_with_result(self, text: str, context: Optional[str] = None) -> TranslationResult:
+    async def translate_with_result_async(
+        self,
+        text: str,
+        context: Optional[str] = None
+    ) -> TranslationResult:
         """
-        Translate text and return detailed result with success/error info.
+        Async variant of translate_with_result using ollama.AsyncClient.
+
+        Lets many requests be in flight on a single event loop thread.
 
         Args:
             text: Text to translate
@@ -101,7 +300,18 @@ class LocalTranslator:
         Returns:
             TranslationResult with translated text and status
         """
-        if not text.strip():
+        result = self._resolve_locally(text)
+        if result is not None:
+            return result
+        try:
+            response = await self._get_async_client().chat(**self._chat_request(text))
+            return self._store_response(text, response)
+        except Exception as e:
+            return self._failed(text, e)
+
+    def _resolve_locally(self, text: str) -> Optional[TranslationResult]:
+        """Result for text that needs no request (untranslatable, too long or cached), else None."""
+        if not self._needs_translation(text):
             return TranslationResult(text=text, success=True)
 
         # Validate input length
@@ -112,33 +322,182 @@ class LocalTranslator:
                 error=f"Text too long ({len(text)} > {self.config.max_text_length} chars)"
             )
 
-        # Build prompt
-        context_info = f" This is a {context}." if context else ""
-        prompt = (
-            f"Translate the following {self.config.source_lang} text to {self.config.target_lang}. "
-            f"Preserve all formatting, line breaks, and special characters.{context_info}\n\n"
-            f"Text to translate:\n{text}\n\n"
-            f"Translation:"
+        cached = self._cache.get(self._cache_key(text))
+        if cached is not None:
+            return TranslationResult(text=cached, success=True)
+        return None
+
+    def _chat_request(self, text: str) -> dict:
+        """Keyword arguments for the chat call that translates a single text."""
+        return {
+            "model": self.config.model,
+            "keep_alive": self.config.keep_alive,
+            "messages": self._build_messages(text),
+            "options": self._text_options(text),
+        }
+
+    def _store_response(self, text: str, response) -> TranslationResult:
+        """Cache the translation in a chat response to text and wrap it as a result."""
+        translation = response['message']['content'].strip()
+        self._cache.put(self._cache_key(text), translation)
+        return TranslationResult(text=translation, success=True)
+
+    @staticmethod
+    def _failed(text: str, error: Exception) -> TranslationResult:
+        """Result for a request that raised, keeping the original text."""
+        return TranslationResult(text=text, success=False, error=f"Translation failed: {error}")
+
+    def _num_predict(self, text: str) -> int:
+        """
+        Output token budget for translating text.
+
+        A CJK character comes out as roughly one to one and a half English
+        tokens, while ASCII (identifiers, URLs, code) passes through at about
+        four characters a token. Budgeting the two separately keeps mixed
+        comments from reserving 1.5 tokens for every Latin letter.
+        """
+        wide = len(text) - len(text.encode('ascii', 'ignore'))
+        ascii_chars = len(text) - wide
+        return min(wide * 3 // 2 + ascii_chars // 3 + 16, self.config.max_num_predict)
+
+    def _options(self, num_predict: int) -> dict:
+        """Generation options shared by every request."""
+        options = {
+            "temperature": self.config.temperature,
+            "num_predict": num_predict,
+        }
+        if self.config.num_thread:
+            options["num_thread"] = self.config.num_thread
+        return options
+
+    def _text_options(self, text: str) -> dict:
+        """Generation options for translating a single text."""
+        options = self._options(self._num_predict(text))
+        # A blank line the source doesn't have is the model starting to chat
+        # ("Note: ..."); stopping there saves decoding the filler
+        if "\n\n" not in text:
+            options["stop"] = ["\n\n"]
+        return options
+
+    def _batch_options(self, texts: list[str]) -> dict:
+        """Generation options for a batched request."""
+        # JSON quoting and separators add output beyond the texts themselves
+        num_predict = min(
+            sum(self._num_predict(t) for t in texts) + 8 * len(texts),
+            self.config.max_num_predict,
         )
+        return self._options(num_predict)
 
-        try:
-            num_predict = min(len(text) * 2, self.config.max_num_predict)
+    def translate_batch_with_result(
+        self,
+        texts: list[tuple[str, Optional[str]]],
+        max_workers: int = 1
+    ) -> list[TranslationResult]:
+        """
+        Translate many texts using as few LLM requests as possible.
 
-            response = ollama.generate(
-                model=self.config.model,
-                prompt=prompt,
-                options={
-                    "temperature": self.config.temperature,
-                    "num_predict": num_predict,
-                }
+        Texts sharing a context are fused, up to batch_size at a time, into a
+        single chat request that asks for a JSON array back. A batch whose reply
+        can't be parsed into the right number of strings is retried once in
+        halves; a half that fails again, or a batch whose request fails
+        outright, falls back to translating its texts one by one. A batch of
+        N texts thus costs at most N + 3 requests.
+
+        Args:
+            texts: List of (text, context) tuples
+            max_workers: Number of requests to have in flight at once
+
+        Returns:
+            List of TranslationResult in the same order as input
+        """
+        # One event loop multiplexes every request over the async client's
+        # connection pool, instead of a thread and connection per batch. The
+        # loop outlives the call so later batches reuse the open connections.
+        with self._batch_lock:
+            if self._batch_loop is None:
+                self._batch_loop = asyncio.new_event_loop()
+            return self._batch_loop.run_until_complete(
+                self.translate_batch_with_result_async(texts, asyncio.Semaphore(max_workers))
             )
 
-            translation = response['response'].strip()
-            return TranslationResult(text=translation, success=True)
+    async def translate_batch_with_result_async(
+        self,
+        texts: list[tuple[str, Optional[str]]],
+        semaphore: Optional[asyncio.Semaphore] = None,
+    ) -> list[TranslationResult]:
+        """
+        Async variant of translate_batch_with_result.
 
-        except Exception as e:
-            error_msg = f"Translation failed: {str(e)}"
-            return TranslationResult(text=text, success=False, error=error_msg)
+        Batches are sent concurrently; if a semaphore is given, each request
+        (batched or fallback) holds it while in flight.
+
+        Args:
+            texts: List of (text, context) tuples
+            semaphore: Optional limit on concurrent requests
+
+        Returns:
+            List of TranslationResult in the same order as input
+        """
+        semaphore = semaphore or asyncio.Semaphore(self.config.batch_size)
+
+        # Boilerplate comments repeat a lot; translate each distinct one once
+        unique: dict[tuple[str, Optional[str]], int] = {}
+        slots = [unique.setdefault(item, len(unique)) for item in texts]
+        if len(unique) < len(texts):
+            unique_results = await self.translate_batch_with_result_async(list(unique), semaphore)
+            return [unique_results[slot] for slot in slots]
+
+        results: list[Optional[TranslationResult]] = [None] * len(texts)
+
+        async def translate_one(index: int) -> None:
+            async with semaphore:
+                results[index] = await self.translate_with_result_async(*texts[index])
+
+        async def translate_batch(
+            context: Optional[str], indices: list[int], split: bool = True
+        ) -> None:
+            batch = [texts[i][0] for i in indices]
+            translations = None
+            malformed = False
+            if len(batch) > 1:
+                try:
+                    async with semaphore:
+                        response = await self._get_async_client().chat(
+                            model=self.config.model,
+                            keep_alive=self.config.keep_alive,
+                            messages=self._build_batch_messages(batch, context),
+                            format="json",
+                            options=self._batch_options(batch),
+                        )
+                    translations = self._parse_batch_response(response['message']['content'], len(batch))
+                    malformed = translations is None
+                except Exception:
+                    translations = None
+
+            if malformed and split:
+                # One split catches a model losing count on a long array; halving
+                # further would cost more requests than going per text
+                mid = len(indices) // 2
+                await asyncio.gather(
+                    translate_batch(context, indices[:mid], split=False),
+                    translate_batch(context, indices[mid:], split=False),
+                )
+            elif translations is None:
+                await asyncio.gather(*(translate_one(i) for i in indices))
+            else:
+                for i, translation in zip(indices, translations):
+                    self._cache.put(self._cache_key(texts[i][0]), translation)
+                    results[i] = TranslationResult(text=translation, success=True)
+
+        await asyncio.gather(*(
+            translate_batch(context, indices)
+            for context, indices in self._plan_batches(texts, results)
+        ))
+
+        # Anything left was too long to batch; report it individually
+        leftovers = [i for i, result in enumerate(results) if result is None]
+        await asyncio.gather(*(translate_one(i) for i in leftovers))
+        return results
 
     def translate_batch(
         self,
@@ -146,36 +505,17 @@ class LocalTranslator:
         max_workers: int = 4
     ) -> list[str]:
         """
-        Translate multiple texts in parallel for improved throughput.
+        Translate multiple texts, fusing them into batched requests.
 
         Args:
             texts: List of (text, context) tuples
-            max_workers: Number of parallel translation threads
+            max_workers: Number of batched requests to run in parallel
 
         Returns:
-            List of translated texts in same order as input
+            List of translated texts in same order as input (originals for
+            any that failed)
         """
         if not texts:
             return []
 
-        # Use ThreadPoolExecutor for parallel translations
-        results = [None] * len(texts)
-
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit all translation tasks
-            future_to_index = {
-                executor.submit(self.translate, text, context): i
-                for i, (text, context) in enumerate(texts)
-            }
-
-            # Collect results as they complete
-            for future in as_completed(future_to_index):
-                index = future_to_index[future]
-                try:
-                    results[index] = future.result()
-                except Exception as e:
-                    # If translation failed, use original text
-                    results[index] = texts[index][0]
-                    print(f"Batch translation failed for item {index}: {e}")
-
-        return results
+        return [result.text for result in self.translate_batch_with_result(texts, max_workers)]
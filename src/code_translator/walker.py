@@ -0,0 +1,47 @@
+"""Fast directory traversal for locating source files."""
+
+import os
+from pathlib import Path
+from typing import Collection, Iterator
+
+
+def iter_source_files(
+    root: Path,
+    skip_dirs: Collection[str] = frozenset(),
+    skip_exts: Collection[str] = frozenset(),
+    recursive: bool = True,
+) -> Iterator[os.DirEntry]:
+    """
+    Walk a directory tree yielding candidate source files.
+
+    Uses os.scandir so file/directory classification comes from the directory
+    read itself instead of an extra stat() per entry. Directories named in
+    skip_dirs are pruned without ever being opened.
+
+    Args:
+        root: Directory to walk
+        skip_dirs: Directory names to prune
+        skip_exts: File extensions (with leading dot) to leave out
+        recursive: Whether to descend into subdirectories
+
+    Yields:
+        os.DirEntry for each remaining file
+    """
+    skip_dirs = frozenset(skip_dirs)
+    skip_suffixes = tuple(ext.lower() for ext in skip_exts)
+    stack = [os.fspath(root)]
+
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive and entry.name not in skip_dirs:
+                            stack.append(entry.path)
+                    elif entry.is_file():
+                        if skip_suffixes and entry.name.lower().endswith(skip_suffixes):
+                            continue
+                        yield entry
+        except OSError:
+            # Unreadable directory - skip it like os.walk does
+            continue
@@ -1,12 +1,14 @@
 """Pytest configuration and shared fixtures."""
 
+import json
 import pytest
 from pathlib import Path
-from unittest.mock import Mock, MagicMock
+from unittest.mock import AsyncMock, Mock, MagicMock
 import tempfile
 import shutil
 
-from code_translator.translator import LocalTranslator, TranslationConfig
+from code_translator import translator as translator_module
+from code_translator.translator import LocalTranslator, TranslationConfig, TranslationResult
 from code_translator.config import Config
 
 
@@ -104,7 +106,25 @@ def mock_translator():
             return text
         return f"TRANSLATED: {text[:20]}..."
 
+    def mock_translate_with_result(text, context=None):
+        return TranslationResult(text=mock_translate(text, context), success=True)
+
+    async def mock_translate_with_result_async(text, context=None):
+        return mock_translate_with_result(text, context)
+
+    def mock_translate_batch_with_result(texts):
+        return [mock_translate_with_result(text, context) for text, context in texts]
+
+    async def mock_translate_batch_with_result_async(texts, semaphore=None):
+        return mock_translate_batch_with_result(texts)
+
     translator.translate.side_effect = mock_translate
+    translator.translate_with_result.side_effect = mock_translate_with_result
+    translator.translate_with_result_async.side_effect = mock_translate_with_result_async
+    translator.translate_batch_with_result.side_effect = mock_translate_batch_with_result
+    translator.translate_batch_with_result_async.side_effect = (
+        mock_translate_batch_with_result_async
+    )
     translator.translate_batch.return_value = [
         "TRANSLATED: comment 1",
         "TRANSLATED: comment 2",
@@ -121,21 +141,32 @@ def mock_ollama(monkeypatch):
     # Mock show() to simulate model exists
     mock_ollama_module.show.return_value = {"model": "qwen2.5:1.5b"}
 
-    # Mock generate() to return fake translations
-    def mock_generate(model, prompt, options=None):
-        # Extract the text after "Text to translate:"
-        if "Text to translate:" in prompt:
-            text = prompt.split("Text to translate:")[1].split("Translation:")[0].strip()
-            # Return a simple "translation"
-            return {"response": f"Translated: {text[:30]}..."}
-        return {"response": "Translated text"}
-
-    mock_ollama_module.generate.side_effect = mock_generate
+    # Source texts of every chat request, in order, so tests needn't re-parse prompts
+    mock_ollama_module.sent_texts = []
+
+    # Mock chat() to return fake translations of the user turn
+    def mock_chat(model, messages, options=None, format=None, **kwargs):
+        content = messages[-1]["content"]
+        # Batched requests carry a JSON array after the instruction line; json
+        # mode only ever replies with an object, like a real server
+        if format == "json":
+            texts = json.loads(content.split("\n", 1)[1])
+            mock_ollama_module.sent_texts.append(texts)
+            reply = json.dumps({"translations": [f"Translated: {t[:30]}..." for t in texts]})
+        else:
+            mock_ollama_module.sent_texts.append([content])
+            reply = f"Translated: {content.strip()[:30]}..."
+        return {"message": {"role": "assistant", "content": reply}}
+
+    mock_ollama_module.chat.side_effect = mock_chat
+    mock_ollama_module.AsyncClient.return_value.chat = AsyncMock(side_effect=mock_chat)
+    mock_ollama_module.AsyncClient.return_value.close = AsyncMock()
     mock_ollama_module.pull.return_value = None
     mock_ollama_module.ResponseError = Exception
 
-    # Patch the ollama import
+    # Patch the ollama import; forget models verified against earlier mocks
     monkeypatch.setattr("code_translator.translator.ollama", mock_ollama_module)
+    translator_module._ensure_model.cache_clear()
 
     return mock_ollama_module
 
@@ -0,0 +1,79 @@
+"""Tests for the translation cache."""
+
+from code_translator.cache import TranslationCache
+from code_translator.translator import LocalTranslator
+
+
+class TestTranslationCache:
+    """Test TranslationCache."""
+
+    def test_key_depends_on_all_parts(self):
+        """Test that changing any key component changes the key."""
+        base = TranslationCache.make_key("m", "Chinese", "English", "注释")
+        assert base == TranslationCache.make_key("m", "Chinese", "English", "注释")
+        assert base != TranslationCache.make_key("m2", "Chinese", "English", "注释")
+        assert base != TranslationCache.make_key("m", "Japanese", "English", "注释")
+        assert base != TranslationCache.make_key("m", "Chinese", "German", "注释")
+        assert base != TranslationCache.make_key("m", "Chinese", "English", "注释 ")
+        assert len(base) == 16
+
+    def test_memory_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = TranslationCache(maxsize=2)
+        cache.put(b"a", "A")
+        cache.put(b"b", "B")
+        assert cache.get(b"a") == "A"  # a is now most recent
+        cache.put(b"c", "C")
+
+        assert cache.get(b"b") is None
+        assert cache.get(b"a") == "A"
+        assert cache.get(b"c") == "C"
+        assert len(cache) == 2
+
+    def test_persists_across_instances(self, temp_dir):
+        """Test that translations survive closing and reopening the cache."""
+        path = temp_dir / "cache" / "translations.db"
+        cache = TranslationCache(path, commit_every=64)
+        cache.put(b"key", "value")
+        cache.close()
+
+        reopened = TranslationCache(path)
+        assert reopened.get(b"key") == "value"
+        reopened.close()
+
+
+class TestTranslatorCaching:
+    """Test that LocalTranslator consults the cache."""
+
+    def test_repeat_translation_skips_llm(self, mock_ollama, translation_config):
+        """Test that translating the same text twice calls Ollama once."""
+        translator = LocalTranslator(translation_config)
+
+        first = translator.translate("返回结果", context="comment")
+        second = translator.translate_with_result("返回结果", context="docstring")
+
+        assert mock_ollama.chat.call_count == 1
+        assert second.text == first
+
+    def test_batch_uses_cache(self, mock_ollama, translation_config):
+        """Test that cached texts are left out of batched requests."""
+        translator = LocalTranslator(translation_config)
+        translator.translate("一")
+
+        results = translator.translate_batch_with_result([("一", None), ("二", None), ("三", None)])
+        translator.translate_batch_with_result([("二", None), ("三", None)])
+
+        # One single request, then one batch for the two uncached texts
+        assert mock_ollama.chat.call_count == 1
+        assert mock_ollama.AsyncClient.return_value.chat.await_count == 1
+        assert [r.text for r in results] == ["Translated: 一...", "Translated: 二...", "Translated: 三..."]
+
+    def test_failures_are_not_cached(self, mock_ollama, translation_config):
+        """Test that failed translations are retried next time."""
+        translator = LocalTranslator(translation_config)
+        working = mock_ollama.chat.side_effect
+        mock_ollama.chat.side_effect = Exception("API Error")
+
+        assert translator.translate_with_result("测试").success is False
+        mock_ollama.chat.side_effect = working
+        assert translator.translate_with_result("测试").success is True
@@ -52,6 +52,13 @@ class TestConfig:
         assert ".jpg" in config.skip_extensions
         assert ".exe" in config.skip_extensions
 
+    def test_skip_filters_normalized_to_frozenset(self):
+        """Test that list filters are converted to frozensets."""
+        config = Config(skip_dirs=["a", "b"], skip_extensions=[".x"])
+
+        assert config.skip_dirs == frozenset({"a", "b"})
+        assert config.skip_extensions == frozenset({".x"})
+
     def test_from_file(self, sample_config_toml):
         """Test loading config from TOML file."""
         config = Config.from_file(sample_config_toml)
@@ -79,6 +86,19 @@ class TestConfig:
         with pytest.raises(Exception):
             Config.from_file(invalid_toml)
 
+    def test_from_file_reloads_after_change(self, temp_dir):
+        """Test that the TOML cache is invalidated when the file changes."""
+        import os
+
+        config_file = temp_dir / ".code-translator.toml"
+        config_file.write_text('[translation]\nmodel = "first:1b"\n')
+        assert Config.from_file(config_file).model == "first:1b"
+
+        config_file.write_text('[translation]\nmodel = "second:1b"\n')
+        stat = config_file.stat()
+        os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert Config.from_file(config_file).model == "second:1b"
+
     def test_merge_with_args(self):
         """Test merging config with command-line arguments."""
         config = Config(model="default:1b", source_lang="Chinese")
@@ -109,6 +129,13 @@ class TestConfig:
         assert merged.model == "default:1b"
         assert merged.max_workers == 4
 
+    def test_merge_with_args_no_cache(self):
+        """Test that --no-cache clears the cache path and the default keeps it."""
+        config = Config(cache_path="/tmp/translations.db")
+
+        assert config.merge_with_args().cache_path == "/tmp/translations.db"
+        assert config.merge_with_args(cache=False).cache_path == ""
+
     def test_find_config_in_current_dir(self, temp_dir, monkeypatch):
         """Test finding config in current directory."""
         config_file = temp_dir / ".code-translator.toml"
@@ -173,3 +200,4 @@ branch_prefix = "i18n/"
         assert config.target_lang == "Spanish"
         assert config.translate_all is True
         assert config.max_workers == 16
+        assert config.skip_dirs == frozenset({"custom_dir"})
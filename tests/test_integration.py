@@ -130,6 +130,34 @@ class TestEndToEnd:
         assert stats.files_scanned >= 2
         assert stats.files_with_foreign_text >= 2
 
+    def test_process_directory_closes_async_client(
+        self, mock_ollama, temp_dir, sample_python_code
+    ):
+        """Test that the AsyncClient made on process_directory's loop is closed with it."""
+        (temp_dir / "test.py").write_text(sample_python_code)
+
+        translator = LocalTranslator(TranslationConfig())
+        processor = FileProcessor(translator, dry_run=True)
+        processor.process_directory(temp_dir, recursive=False)
+
+        assert mock_ollama.AsyncClient.call_count == 1
+        mock_ollama.AsyncClient.return_value.close.assert_awaited_once()
+
+    def test_process_directory_after_sync_batch_keeps_clients_apart(
+        self, mock_ollama, temp_dir, sample_python_code
+    ):
+        """Test that each event loop's AsyncClient is closed, not replaced and leaked."""
+        (temp_dir / "test.py").write_text(sample_python_code)
+
+        translator = LocalTranslator(TranslationConfig())
+        translator.translate_batch_with_result([("一", None), ("二", None)])
+        processor = FileProcessor(translator, dry_run=True)
+        processor.process_directory(temp_dir, recursive=False)
+        translator.close()
+
+        assert mock_ollama.AsyncClient.call_count == 2
+        assert mock_ollama.AsyncClient.return_value.close.await_count == 2
+
     def test_nested_directory_structure(
         self, mock_ollama, temp_dir, sample_python_code
     ):
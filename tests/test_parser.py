@@ -1,5 +1,7 @@
 """Tests for the parser module."""
 
+import dataclasses
+import pickle
 import pytest
 from code_translator.parser import CodeParser, ElementType, CodeElement
 
@@ -28,6 +30,12 @@ class TestCodeParser:
         assert CodeParser.detect_language(Path("test.md")) is None
         assert CodeParser.detect_language(Path("README")) is None
 
+    def test_detect_language_case_insensitive(self):
+        """Test that extensions are matched case-insensitively."""
+        from pathlib import Path
+        assert CodeParser.detect_language(Path("Main.JAVA")) == "java"
+        assert CodeParser.detect_language(Path("lib.Rs")) == "rust"
+
     def test_contains_non_ascii_chinese(self):
         """Test detection of Chinese characters."""
         assert CodeParser.contains_non_ascii("这是中文")
@@ -40,6 +48,13 @@ class TestCodeParser:
         assert not CodeParser.contains_non_ascii("def test():")
         assert not CodeParser.contains_non_ascii("// comment")
 
+    def test_contains_non_ascii_kana_and_hangul(self):
+        """Test detection of Japanese kana and Korean hangul."""
+        assert CodeParser.contains_non_ascii("ひらがな")
+        assert CodeParser.contains_non_ascii("カタカナ")
+        assert CodeParser.contains_non_ascii("한국어")
+        assert not CodeParser.contains_non_ascii("café")
+
     def test_extract_python_line_comments(self, sample_python_code):
         """Test extraction of Python line comments."""
         elements = CodeParser.extract_comments_and_docstrings(
@@ -86,6 +101,46 @@ class TestCodeParser:
         assert any("Java类" in text for text in comment_texts)
         assert any("加法方法" in text for text in comment_texts)
 
+    def test_javadoc_extracted_once(self):
+        """Test that a javadoc block is a single docstring, not also a block comment."""
+        code = "/**\n * 这是一个Java类\n */\nclass A {}\n"
+        elements = CodeParser.extract_comments_and_docstrings(code, "java")
+
+        assert len(elements) == 1
+        assert elements[0].type == ElementType.DOCSTRING
+
+    def test_rust_doc_comment_extracted_once(self):
+        """Test that /// doc comments are not also reported as // comments."""
+        code = "/// 文档注释\nfn main() {}\n"
+        elements = CodeParser.extract_comments_and_docstrings(code, "rust")
+
+        assert len(elements) == 1
+        assert elements[0].type == ElementType.DOCSTRING
+        assert elements[0].text == "文档注释"
+
+    def test_hash_inside_docstring_not_a_comment(self):
+        """Test that '#' inside a docstring does not start a line comment."""
+        code = '"""\n说明 # 不是注释\n"""\n'
+        elements = CodeParser.extract_comments_and_docstrings(code, "python")
+
+        assert [e.type for e in elements] == [ElementType.DOCSTRING]
+
+    def test_marker_inside_string_not_a_comment(self):
+        """Test that '#' or '//' inside a string literal doesn't start a comment."""
+        code = 'url = "http://x/#锚点"  # 注释\n'
+        elements = CodeParser.extract_comments_and_docstrings(code, "python")
+        assert [e.text for e in elements] == ["注释"]
+
+        code = 'const u = "a//路径"; // 注释\n'
+        elements = CodeParser.extract_comments_and_docstrings(code, "javascript")
+        assert [e.text for e in elements] == ["注释"]
+
+    def test_quote_char_literal_does_not_hide_comments(self):
+        """Test that a quote character literal can't swallow later comments."""
+        code = "char q = '\"';\n// 第一\nString s = \"x\"; // 第二\n"
+        elements = CodeParser.extract_comments_and_docstrings(code, "java")
+        assert [e.text for e in elements] == ["第一", "第二"]
+
     def test_no_extraction_without_chinese(self, sample_code_no_chinese):
         """Test that English-only code yields no elements."""
         elements = CodeParser.extract_comments_and_docstrings(
@@ -132,6 +187,24 @@ class TestCodeParser:
         assert element.start_line >= 0
         assert element.end_line >= element.start_line
 
+    def test_code_element_slots_and_frozen(self, sample_python_code):
+        """Test that CodeElement is a slotted, immutable record that pickles."""
+        element = CodeParser.extract_comments_and_docstrings(sample_python_code, "python")[0]
+
+        assert not hasattr(element, "__dict__")
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            element.text = "changed"
+        assert pickle.loads(pickle.dumps(element)) == element
+
+    def test_element_offsets_cover_text(self, sample_python_code, sample_javascript_code):
+        """Test that start/end offsets slice exactly the element text."""
+        for content, language in (
+            (sample_python_code, "python"),
+            (sample_javascript_code, "javascript"),
+        ):
+            for element in CodeParser.extract_all_translatable(content, language):
+                assert content[element.start_offset:element.end_offset] == element.text
+
     def test_empty_file(self):
         """Test parsing empty file."""
         elements = CodeParser.extract_comments_and_docstrings("", "python")
@@ -143,6 +216,73 @@ class TestCodeParser:
         elements = CodeParser.extract_comments_and_docstrings(code, "python")
         assert len(elements) == 0
 
+    def test_extract_from_path(self, temp_dir, sample_python_code):
+        """Test extraction straight from a file matches in-memory extraction."""
+        test_file = temp_dir / "test.py"
+        test_file.write_text(sample_python_code, encoding="utf-8")
+
+        from_path = CodeParser.extract_from_path(test_file)
+        in_memory = CodeParser.extract_comments_and_docstrings(sample_python_code, "python")
+
+        assert from_path == in_memory
+
+    def test_extract_from_path_ascii_and_empty(self, temp_dir, sample_code_no_chinese):
+        """Test that ASCII-only and empty files yield no elements."""
+        ascii_file = temp_dir / "ascii.py"
+        ascii_file.write_text(sample_code_no_chinese)
+        empty_file = temp_dir / "empty.py"
+        empty_file.write_text("")
+
+        assert CodeParser.extract_from_path(ascii_file) == []
+        assert CodeParser.extract_from_path(empty_file) == []
+
+    def test_extract_from_path_non_cjk_unicode(self, temp_dir):
+        """Test that non-CJK Unicode files are rejected by the byte prefilter."""
+        latin_file = temp_dir / "latin.py"
+        latin_file.write_text("# café naïve résumé ✓\n", encoding="utf-8")
+
+        assert CodeParser.extract_from_path(latin_file) == []
+
+    def test_extract_from_path_kana_and_hangul(self, temp_dir):
+        """Test that kana and hangul pass the byte prefilter."""
+        test_file = temp_dir / "i18n.py"
+        test_file.write_text("# ひらがな\n# 한국어\n", encoding="utf-8")
+
+        texts = [e.text for e in CodeParser.extract_from_path(test_file)]
+        assert texts == ["ひらがな", "한국어"]
+
+    def test_read_and_extract_normalizes_crlf(self, temp_dir):
+        """Test that CRLF line endings are normalized before extraction."""
+        test_file = temp_dir / "crlf.py"
+        test_file.write_bytes("# 注释\r\nx = 1\r\n".encode("utf-8"))
+
+        content, elements = CodeParser.read_and_extract(test_file, "python")
+        assert content == "# 注释\nx = 1\n"
+        assert [e.text for e in elements] == ["注释"]
+
+    def test_extract_from_path_invalid_utf8(self, temp_dir):
+        """Test that undecodable files raise UnicodeDecodeError."""
+        bad_file = temp_dir / "bad.py"
+        bad_file.write_bytes(b"# \xe4\x80\n")
+
+        with pytest.raises(UnicodeDecodeError):
+            CodeParser.extract_from_path(bad_file)
+
+    def test_parse_many(self, temp_dir, sample_python_code, sample_code_no_chinese):
+        """Test parallel parsing of multiple files."""
+        (temp_dir / "a.py").write_text(sample_python_code)
+        (temp_dir / "b.py").write_text(sample_code_no_chinese)
+        (temp_dir / "c.txt").write_text(sample_python_code)
+
+        paths = sorted(temp_dir.iterdir())
+        ordered = list(CodeParser.parse_many(paths, workers=2))
+        results = dict(ordered)
+
+        assert [path for path, _ in ordered] == paths
+        assert len(results[temp_dir / "a.py"]) > 0
+        assert results[temp_dir / "b.py"] == []
+        assert results[temp_dir / "c.txt"] == []
+
     def test_multiline_docstring(self):
         """Test multiline docstring extraction."""
         code = '''"""
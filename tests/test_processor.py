@@ -1,8 +1,14 @@
 """Tests for the processor module."""
 
+import asyncio
+import os
+import sys
 import pytest
 from pathlib import Path
+from unittest.mock import Mock
+from code_translator.parser import CodeParser
 from code_translator.processor import FileProcessor, ProcessingStats
+from code_translator.translator import TranslationResult
 
 
 class TestProcessingStats:
@@ -31,6 +37,26 @@ class TestProcessingStats:
         assert stats.files_translated == 5
         assert len(stats.errors) == 1
 
+    def test_stats_merge(self):
+        """Test merging per-file stats into a running total."""
+        total = ProcessingStats(files_scanned=2, errors=["a"])
+        shard = ProcessingStats()
+        shard.increment_scanned()
+        shard.increment_with_foreign_text()
+        shard.increment_translated()
+        shard.increment_elements_translated(3)
+        shard.increment_skipped()
+        shard.add_error("b")
+
+        total.merge(shard)
+
+        assert total.files_scanned == 3
+        assert total.files_with_foreign_text == 1
+        assert total.files_translated == 1
+        assert total.elements_translated == 3
+        assert total.files_skipped == 1
+        assert total.errors == ["a", "b"]
+
 
 class TestFileProcessor:
     """Test FileProcessor class."""
@@ -65,6 +91,43 @@ class TestFileProcessor:
             assert "unsupported" not in reason.lower()
             assert "binary" not in reason.lower()
 
+    def test_should_skip_dir_entry(self, mock_translator, temp_dir):
+        """Test that DirEntry objects from the walk are accepted."""
+        processor = FileProcessor(mock_translator)
+        (temp_dir / "test.py").write_text("# 注释")
+        (temp_dir / "image.PNG").write_bytes(b"\x89PNG")
+
+        with os.scandir(temp_dir) as it:
+            entries = {entry.name: entry for entry in it}
+
+        assert processor.should_skip_file(entries["test.py"]) == (False, None)
+        assert processor.should_skip_file(entries["image.PNG"]) == (True, "binary/media file")
+
+    def test_language_detected_once(self, mock_translator, temp_dir, mocker):
+        """Test that processing a file doesn't re-run language detection."""
+        processor = FileProcessor(mock_translator, dry_run=True)
+        detect = mocker.spy(CodeParser, "detect_language")
+
+        test_file = temp_dir / "Main.JAVA"
+        test_file.write_text("// 注释\n")
+
+        assert processor._check_file(test_file) == (False, None, "java")
+        assert processor.process_file(test_file) is not None
+        detect.assert_not_called()
+
+    def test_ext_matches_splitext(self):
+        """Test that _ext agrees with os.path.splitext on edge cases."""
+        for name in ["a.py", "A.PY", "archive.tar.gz", ".gitignore", "..hidden", "noext", "x."]:
+            assert FileProcessor._ext(name) == os.path.splitext(name)[1].lower()
+
+    def test_custom_skip_extensions(self, mock_translator):
+        """Test that configured skip extensions replace the defaults."""
+        processor = FileProcessor(mock_translator, skip_extensions={".js"})
+
+        should_skip, reason = processor.should_skip_file(Path("app.js"))
+        assert should_skip is True
+        assert "binary" in reason.lower()
+
     def test_process_file_with_chinese(
         self, mock_translator, temp_dir, sample_python_code
     ):
@@ -100,6 +163,51 @@ class TestFileProcessor:
         assert processor.stats.files_scanned == 1
         assert processor.stats.files_with_foreign_text == 0
 
+    def test_process_file_ascii_skips_parser(
+        self, mock_translator, temp_dir, sample_code_no_chinese, mocker
+    ):
+        """Test that pure-ASCII files never reach the parser."""
+        processor = FileProcessor(mock_translator, dry_run=True)
+        extract = mocker.patch(
+            "code_translator.processor.CodeParser.extract_comments_and_docstrings"
+        )
+
+        test_file = temp_dir / "test.py"
+        test_file.write_text(sample_code_no_chinese)
+
+        assert processor.process_file(test_file) is None
+        extract.assert_not_called()
+        assert processor.stats.files_skipped == 0
+
+    def test_process_file_crlf(self, mock_translator, temp_dir):
+        """Test that CRLF line endings are normalized like read_text() did."""
+        processor = FileProcessor(mock_translator, dry_run=True)
+
+        test_file = temp_dir / "test.py"
+        test_file.write_bytes("# 注释\r\nx = 1\r\n".encode("utf-8"))
+
+        result = processor.process_file(test_file)
+
+        assert result is not None
+        assert mock_translator.translate_batch_with_result.call_args.args[0] == [
+            ("注释", "comment")
+        ]
+
+    def test_process_file_dedupes_texts(self, mock_translator, temp_dir):
+        """Test that repeated texts in a file are translated once."""
+        processor = FileProcessor(mock_translator, dry_run=False)
+
+        test_file = temp_dir / "test.py"
+        test_file.write_text("# 待办\nx = 1\n# 待办\n# 其他\n# 待办\n")
+
+        result = processor.process_file(test_file)
+
+        assert result["elements_count"] == 4
+        assert mock_translator.translate_batch_with_result.call_args.args[0] == [
+            ("待办", "comment"), ("其他", "comment"),
+        ]
+        assert test_file.read_text().count("# TRANSLATED: 待办...") == 3
+
     def test_process_file_dry_run(
         self, mock_translator, temp_dir, sample_python_code
     ):
@@ -132,6 +240,53 @@ class TestFileProcessor:
         if result:  # Only check if processing succeeded
             assert processor.stats.files_translated >= 0
 
+    def test_process_file_write_is_atomic(self, mock_translator, temp_dir):
+        """Test that writes replace the file in place and keep its permissions."""
+        processor = FileProcessor(mock_translator, dry_run=False)
+
+        test_file = temp_dir / "script.py"
+        test_file.write_text("#!/usr/bin/env python3\n# 注释\n")
+        test_file.chmod(0o755)
+
+        processor.process_file(test_file)
+
+        assert "TRANSLATED:" in test_file.read_text()
+        assert test_file.stat().st_mode & 0o777 == 0o755
+        assert [p.name for p in temp_dir.iterdir()] == ["script.py"]
+
+    def test_process_file_writes_through_symlink(self, mock_translator, temp_dir):
+        """Test that a symlinked file's target is translated and the link is kept."""
+        processor = FileProcessor(mock_translator, dry_run=False)
+
+        (temp_dir / "real").mkdir()
+        target = temp_dir / "real" / "target.py"
+        target.write_text("# 注释\n")
+        link = temp_dir / "link.py"
+        link.symlink_to(target)
+
+        processor.process_file(link)
+
+        assert link.is_symlink()
+        assert "TRANSLATED:" in target.read_text()
+        assert sorted(p.name for p in (temp_dir / "real").iterdir()) == ["target.py"]
+
+    def test_process_file_unchanged_not_written(self, mock_translator, temp_dir):
+        """Test that files whose translation is identical are not rewritten."""
+        mock_translator.translate_batch_with_result.side_effect = lambda texts: [
+            TranslationResult(text=text, success=True) for text, _ in texts
+        ]
+        processor = FileProcessor(mock_translator, dry_run=False)
+
+        test_file = temp_dir / "test.py"
+        test_file.write_text("# 注释\n")
+        mtime = test_file.stat().st_mtime_ns
+
+        result = processor.process_file(test_file)
+
+        assert result is not None
+        assert processor.stats.files_translated == 0
+        assert test_file.stat().st_mtime_ns == mtime
+
     def test_process_file_translate_all(
         self, mock_translator, temp_dir, sample_python_code
     ):
@@ -150,6 +305,23 @@ class TestFileProcessor:
         # Should process and find string literals too
         assert result is not None
 
+    @pytest.mark.asyncio
+    async def test_process_file_async(
+        self, mock_translator, temp_dir, sample_python_code
+    ):
+        """Test async processing of a single file."""
+        processor = FileProcessor(mock_translator, dry_run=False)
+
+        test_file = temp_dir / "test.py"
+        test_file.write_text(sample_python_code)
+
+        result = await processor.process_file_async(test_file, asyncio.Semaphore(1))
+
+        assert result is not None
+        assert processor.stats.files_translated == 1
+        assert "TRANSLATED:" in test_file.read_text()
+        mock_translator.translate_batch_with_result_async.assert_called_once()
+
     def test_process_directory_recursive(
         self, mock_translator, temp_dir, sample_python_code
     ):
@@ -171,6 +343,109 @@ class TestFileProcessor:
         assert stats.files_scanned >= 3
         assert stats.files_with_foreign_text >= 3
 
+    def test_process_directory_writes_translations(
+        self, mock_translator, temp_dir, sample_python_code
+    ):
+        """Test that directory processing writes translated content."""
+        processor = FileProcessor(mock_translator, dry_run=False, max_workers=2)
+
+        test_file = temp_dir / "test.py"
+        test_file.write_text(sample_python_code)
+
+        stats = processor.process_directory(temp_dir, recursive=False)
+
+        assert stats.files_translated == 1
+        assert "TRANSLATED:" in test_file.read_text()
+
+    def test_process_directory_progress_and_window(
+        self, mock_translator, temp_dir, sample_python_code
+    ):
+        """Test progress reporting and the bounded in-flight file window."""
+        processor = FileProcessor(mock_translator, dry_run=True, max_workers=1)
+
+        for i in range(10):
+            (temp_dir / f"test{i}.py").write_text(sample_python_code)
+
+        in_flight = 0
+        peak = 0
+        original = processor._process_file_async
+
+        async def tracking(file_path, translate, parse_pool=None):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            try:
+                return await original(file_path, translate, parse_pool)
+            finally:
+                in_flight -= 1
+
+        processor._process_file_async = tracking
+        progress = []
+        stats = processor.process_directory(
+            temp_dir, recursive=False, on_progress=lambda done, total: progress.append((done, total))
+        )
+
+        assert not stats.errors
+        assert progress[-1] == (10, 10)
+        assert [done for done, _ in progress] == list(range(1, 11))
+        assert 1 <= peak <= 4
+
+    def test_process_directory_batches_across_files(self, mock_translator, temp_dir):
+        """Test that texts from several small files share one batch."""
+        processor = FileProcessor(mock_translator, dry_run=False, max_workers=2)
+
+        for i, text in enumerate(["第一", "第二", "第三"]):
+            (temp_dir / f"test{i}.py").write_text(f"# {text}\n")
+
+        stats = processor.process_directory(temp_dir, recursive=False)
+
+        assert stats.files_translated == 3
+        batch_calls = mock_translator.translate_batch_with_result_async.call_args_list
+        assert len(batch_calls) == 1
+        assert sorted(batch_calls[0].args[0]) == [
+            ("第一", "comment"), ("第三", "comment"), ("第二", "comment"),
+        ]
+        for i, text in enumerate(["第一", "第二", "第三"]):
+            assert (temp_dir / f"test{i}.py").read_text() == f"# TRANSLATED: {text}...\n"
+
+    def test_process_directory_parse_processes(
+        self, mock_translator, temp_dir, sample_python_code
+    ):
+        """Test parsing in worker processes gives the same results."""
+        processor = FileProcessor(mock_translator, dry_run=False, parse_processes=2)
+
+        for i in range(4):
+            (temp_dir / f"test{i}.py").write_text(sample_python_code)
+        (temp_dir / "plain.py").write_text("x = 1\n")
+        (temp_dir / "bad.py").write_bytes(b"# \xe4\x80\n")
+
+        stats = processor.process_directory(temp_dir, recursive=False)
+
+        assert stats.files_scanned == 6
+        assert stats.files_with_foreign_text == 4
+        assert stats.files_translated == 4
+        assert stats.files_skipped == 1
+        assert any("bad.py" in error for error in stats.errors)
+        assert "TRANSLATED:" in (temp_dir / "test0.py").read_text()
+
+    def test_parse_pool_only_for_large_runs(self, mock_translator):
+        """Test the default process-pool threshold and the threads-only setting."""
+        processor = FileProcessor(mock_translator)
+        assert processor._make_parse_pool(processor.PROCESS_POOL_MIN_FILES - 1) is None
+
+        processor = FileProcessor(mock_translator, parse_processes=0)
+        assert processor._make_parse_pool(10_000) is None
+
+    def test_parse_pool_skipped_without_gil(self, mock_translator, monkeypatch):
+        """Test that free-threaded builds parse in threads unless processes are requested."""
+        monkeypatch.setattr("code_translator.processor._GIL_ENABLED", False)
+
+        assert FileProcessor(mock_translator)._make_parse_pool(10_000) is None
+
+        pool = FileProcessor(mock_translator, parse_processes=1)._make_parse_pool(10_000)
+        assert pool is not None
+        pool.shutdown()
+
     def test_process_directory_non_recursive(
         self, mock_translator, temp_dir, sample_python_code
     ):
@@ -276,3 +551,119 @@ class TestFileProcessor:
         # All files should be processed
         assert stats.files_scanned >= 10
         assert stats.files_with_foreign_text >= 10
+
+    def test_status_output_buffered(
+        self, mock_translator, temp_dir, sample_python_code, capsys, mocker
+    ):
+        """Test that per-file status lines are written in blocks."""
+        processor = FileProcessor(mock_translator, dry_run=True, max_workers=4)
+        for i in range(70):
+            (temp_dir / f"test{i}.py").write_text(sample_python_code)
+        write = mocker.spy(sys.stdout, "write")
+
+        processor.process_directory(temp_dir, recursive=False)
+
+        status_lines = [line for line in capsys.readouterr().out.splitlines() if line.startswith("✓")]
+        assert len(status_lines) == 70
+        # One block of 64, the remaining 6, plus the "Processing..." print
+        assert write.call_count <= 5
+
+
+class TestReconstructFile:
+    """Test offset-based file reconstruction."""
+
+    @staticmethod
+    def _reconstruct(content, language, translations, translate_all=False):
+        if translate_all:
+            elements = CodeParser.extract_all_translatable(content, language)
+        else:
+            elements = CodeParser.extract_comments_and_docstrings(content, language)
+        processor = FileProcessor(Mock())
+        return processor._reconstruct_file(
+            content, [(element, translations[element.text]) for element in elements]
+        )
+
+    def test_python_comments_docstrings_and_strings(self):
+        """Test that delimiters and surrounding code are preserved."""
+        content = (
+            '"""模块"""\n'
+            'x = 1  #尾注释\n'
+            'msg = "消息"\n'
+        )
+        result = self._reconstruct(
+            content, "python",
+            {"模块": "Module", "尾注释": "trailing", "消息": "message"},
+            translate_all=True,
+        )
+
+        assert result == '"""Module"""\nx = 1  #trailing\nmsg = "message"\n'
+
+    def test_multiline_docstring_reindented(self):
+        """Test that continuation lines take the original indentation."""
+        content = (
+            'def f():\n'
+            '    """求和\n'
+            '\n'
+            '    参数:\n'
+            '        a: 第一\n'
+            '    """\n'
+        )
+        translation = "Sum\n\nArgs:\n    a: first"
+        result = self._reconstruct(
+            content, "python", {"求和\n\n    参数:\n        a: 第一": translation}
+        )
+
+        assert result == (
+            'def f():\n'
+            '    """Sum\n'
+            '\n'
+            '    Args:\n'
+            '        a: first\n'
+            '    """\n'
+        )
+
+    def test_block_comments_keep_gutter(self):
+        """Test that block comments are replaced inside their markers."""
+        content = (
+            '    /**\n'
+            '     * 计算总和\n'
+            '     * @param a 第一个数\n'
+            '     */\n'
+            '    /* 块注释 */ return a;\n'
+        )
+        result = self._reconstruct(content, "java", {
+            "* 计算总和\n     * @param a 第一个数": "* Compute the sum\n * @param a first",
+            "块注释": "block comment",
+        })
+
+        assert result == (
+            '    /**\n'
+            '     * Compute the sum\n'
+            '     * @param a first\n'
+            '     */\n'
+            '    /* block comment */ return a;\n'
+        )
+
+    def test_marker_characters_in_code_and_text(self):
+        """Test that '#' and '//' outside the comment marker are left alone."""
+        content = 'url = "http://x/#a"  # 注释 // 不是标记\n'
+        result = self._reconstruct(content, "python", {"注释 // 不是标记": "note // not a marker"})
+
+        assert result == 'url = "http://x/#a"  # note // not a marker\n'
+
+        content = 'const u = "a//b";  // 注释 # 文本\n'
+        result = self._reconstruct(content, "javascript", {"注释 # 文本": "comment # text"})
+
+        assert result == 'const u = "a//b";  // comment # text\n'
+
+    def test_no_elements_returns_original(self):
+        """Test that a file with nothing to translate is returned as-is."""
+        content = "x = 1\n"
+        assert FileProcessor(Mock())._reconstruct_file(content, []) is content
+
+    def test_single_line_comment_newlines_folded(self):
+        """Test that a multi-line translation can't break a line comment."""
+        content = "x = 1  # 注释\ny = 2\n"
+        result = self._reconstruct(content, "python", {"注释": "a\ncomment"})
+
+        assert result == "x = 1  # a comment\ny = 2\n"
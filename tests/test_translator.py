@@ -1,7 +1,9 @@
 """Tests for the translator module."""
 
+import dataclasses
+
 import pytest
-from code_translator.translator import LocalTranslator, TranslationConfig
+from code_translator.translator import LocalTranslator, TranslationConfig, TranslationResult
 
 
 class TestTranslationConfig:
@@ -28,6 +30,45 @@ class TestTranslationConfig:
         assert config.target_lang == "French"
         assert config.temperature == 0.7
 
+    def test_quantization_selects_tag(self):
+        """Test that quantization resolves to the matching instruct tag."""
+        assert TranslationConfig(quantization="q4_0").model == "qwen2.5:1.5b-instruct-q4_0"
+        assert TranslationConfig(
+            model="gemma2:2b-instruct", quantization="q8_0"
+        ).model == "gemma2:2b-instruct-q8_0"
+        assert TranslationConfig(
+            model="qwen2.5:1.5b-instruct-q4_0", quantization="q4_0"
+        ).model == "qwen2.5:1.5b-instruct-q4_0"
+        assert TranslationConfig().model == "qwen2.5:1.5b"
+
+    def test_quantization_replaces_existing_tag(self):
+        """Test that quantization replaces a tag's existing quantization suffix."""
+        assert TranslationConfig(
+            model="qwen2.5:1.5b-instruct-q8_0", quantization="q4_0"
+        ).model == "qwen2.5:1.5b-instruct-q4_0"
+        assert TranslationConfig(
+            model="qwen2.5:7b-instruct-q4_K_M", quantization="q8_0"
+        ).model == "qwen2.5:7b-instruct-q8_0"
+
+    def test_quantization_leaves_unrecognised_names(self, capsys):
+        """Test that model names not in name:size form are left unchanged, with a warning."""
+        assert TranslationConfig(model="llama3.2", quantization="q4_0").model == "llama3.2"
+        assert "Warning" in capsys.readouterr().out
+        assert TranslationConfig(
+            model="qwen2.5:latest", quantization="q4_0"
+        ).model == "qwen2.5:latest"
+        assert "q4_0" in capsys.readouterr().out
+
+    def test_result_is_slotted_and_frozen(self):
+        """Test that results carry no __dict__ and can be hashed and compared by value."""
+        result = TranslationResult(text="ok", success=True)
+
+        assert not hasattr(result, "__dict__")
+        assert not hasattr(TranslationConfig(), "__dict__")
+        assert hash(result) == hash(TranslationResult(text="ok", success=True))
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            result.text = "changed"
+
 
 class TestLocalTranslator:
     """Test LocalTranslator class."""
@@ -43,6 +84,24 @@ class TestLocalTranslator:
         # Should have called show() to verify model
         mock_ollama.show.assert_called()
 
+    def test_translator_verifies_model_once(self, mock_ollama, translation_config):
+        """Test that later translators for the same model skip the show() round-trip."""
+        LocalTranslator(translation_config)
+        LocalTranslator(translation_config)
+
+        assert mock_ollama.show.call_count == 1
+
+    def test_translator_preloads_model(self, mock_ollama, translation_config):
+        """Test that initialization loads the model and warms the system prompt."""
+        translator = LocalTranslator(translation_config)
+
+        mock_ollama.generate.assert_called_once()
+        kwargs = mock_ollama.generate.call_args.kwargs
+        assert kwargs["model"] == translation_config.model
+        assert kwargs["system"] == translator._build_messages("")[0]["content"]
+        assert kwargs["keep_alive"] == translation_config.keep_alive
+        assert kwargs["options"]["num_predict"] == 1
+
     def test_translator_pull_missing_model(self, mock_ollama, translation_config):
         """Test that missing models are pulled."""
         # Make show() raise an error (model not found)
@@ -84,6 +143,24 @@ class TestLocalTranslator:
         # Should return original whitespace
         assert result == "   \n  "
 
+    def test_translate_skips_text_without_source_script(self, mock_ollama, translation_config):
+        """Test that text with no source-language characters never reaches Ollama."""
+        translator = LocalTranslator(translation_config)
+
+        assert translator.translate("already English") == "already English"
+        assert translator.translate_with_result("café ✓").text == "café ✓"
+        results = translator.translate_batch_with_result([("x = 1", None), ("中文", None)])
+
+        assert mock_ollama.chat.call_count == 0
+        assert [r.text for r in results] == ["x = 1", "Translated: 中文..."]
+
+    def test_translate_unlisted_source_lang_not_filtered(self, mock_ollama, translation_config):
+        """Test that languages without a script table always translate."""
+        translation_config.source_lang = "German"
+        translator = LocalTranslator(translation_config)
+
+        assert translator.translate("Rückgabewert") == "Translated: Rückgabewert..."
+
     def test_translate_with_context(self, mock_ollama, translation_config):
         """Test that context is used in translation."""
         translator = LocalTranslator(translation_config)
@@ -110,12 +187,208 @@ class TestLocalTranslator:
             assert result is not None
             assert len(result) > 0
 
+    def test_translate_batch_fuses_requests(self, mock_ollama, translation_config):
+        """Test that translate_batch sends one request per context group."""
+        translator = LocalTranslator(translation_config)
+
+        texts = [("第一条注释", "comment"), ("第二条注释", "comment"), ("文档字符串", "docstring")]
+        results = translator.translate_batch(texts, max_workers=2)
+
+        # One fused comment batch plus a lone docstring
+        assert mock_ollama.AsyncClient.return_value.chat.await_count == 2
+        assert results == ["Translated: 第一条注释...", "Translated: 第二条注释...", "Translated: 文档字符串..."]
+        calls = mock_ollama.AsyncClient.return_value.chat.call_args_list
+        assert calls
+        for call in calls:
+            assert call.kwargs["keep_alive"] == translation_config.keep_alive
+
+    @pytest.mark.asyncio
+    async def test_translate_with_result_async(self, mock_ollama, translation_config):
+        """Test async translation through the AsyncClient."""
+        translator = LocalTranslator(translation_config)
+
+        result = await translator.translate_with_result_async("测试", context="comment")
+
+        assert result.success is True
+        assert "Translated:" in result.text
+        mock_ollama.AsyncClient.return_value.chat.assert_awaited()
+
+    @pytest.mark.asyncio
+    async def test_translate_with_result_async_error(self, mock_ollama, translation_config):
+        """Test that async translation errors are reported, not raised."""
+        translator = LocalTranslator(translation_config)
+        mock_ollama.AsyncClient.return_value.chat.side_effect = Exception("API Error")
+
+        result = await translator.translate_with_result_async("测试文本")
+
+        assert result.success is False
+        assert result.text == "测试文本"
+        assert "API Error" in result.error
+
+    def test_translate_batch_with_result_fuses_requests(self, mock_ollama, translation_config):
+        """Test that texts sharing a context go out in one request."""
+        translator = LocalTranslator(translation_config)
+
+        texts = [("第一条注释", "comment"), ("第二条注释", "comment"), ("", "comment")]
+        results = translator.translate_batch_with_result(texts)
+
+        assert mock_ollama.AsyncClient.return_value.chat.await_count == 1
+        assert [r.success for r in results] == [True, True, True]
+        assert results[0].text == "Translated: 第一条注释..."
+        assert results[1].text == "Translated: 第二条注释..."
+        assert results[2].text == ""
+
+    def test_translate_batch_with_result_groups_by_context(
+        self, mock_ollama, translation_config
+    ):
+        """Test that batches respect context and batch_size."""
+        translation_config.batch_size = 2
+        translator = LocalTranslator(translation_config)
+
+        texts = [("一", "comment"), ("二", "docstring"), ("三", "comment"), ("四", "comment")]
+        results = translator.translate_batch_with_result(texts)
+
+        # comment: [一, 三] + [四] (single), docstring: [二] (single)
+        assert mock_ollama.AsyncClient.return_value.chat.await_count == 3
+        assert [r.text for r in results] == [
+            "Translated: 一...", "Translated: 二...", "Translated: 三...", "Translated: 四...",
+        ]
+
+    def test_translate_batch_with_result_bins_by_length(self, mock_ollama, translation_config):
+        """Test that a batch closes once its texts reach half of max_text_length."""
+        translation_config.max_text_length = 20
+        translator = LocalTranslator(translation_config)
+
+        texts = [("一二三四", None), ("五六七八", None), ("九十", None), ("十一十二", None)]
+        results = translator.translate_batch_with_result(texts)
+
+        # 10 chars per batch: [一二三四, 五六七八, 九十] + [十一十二]
+        assert mock_ollama.AsyncClient.return_value.chat.await_count == 2
+        assert all(r.success for r in results)
+
+    def test_parse_batch_response_expects_object(self):
+        """Test that batched replies are read from the object json mode returns."""
+        parse = LocalTranslator._parse_batch_response
+
+        assert parse('{"translations": [" a ", "b"]}', 2) == ["a", "b"]
+        assert parse('["a", "b"]', 2) is None
+        assert parse('{"translations": ["a"]}', 2) is None
+        assert parse('{"other": ["a", "b"]}', 2) is None
+
+    def test_translate_batch_with_result_falls_back(self, mock_ollama, translation_config):
+        """Test per-item fallback when the batched reply is malformed."""
+        translator = LocalTranslator(translation_config)
+        single = mock_ollama.AsyncClient.return_value.chat.side_effect
+
+        def malformed_batch(model, messages, options=None, format=None, **kwargs):
+            if format == "json":
+                return {"message": {"role": "assistant", "content": '{"translations": ["only one"]}'}}
+            return single(model, messages, options)
+
+        mock_ollama.AsyncClient.return_value.chat.side_effect = malformed_batch
+
+        results = translator.translate_batch_with_result([("一", None), ("二", None)])
+
+        assert mock_ollama.AsyncClient.return_value.chat.await_count == 3
+        assert [r.text for r in results] == ["Translated: 一...", "Translated: 二..."]
+
+    def test_translate_batch_with_result_splits_malformed_batch(
+        self, mock_ollama, translation_config
+    ):
+        """Test that a malformed batch is retried in halves before going per-item."""
+        translator = LocalTranslator(translation_config)
+        fused = mock_ollama.AsyncClient.return_value.chat.side_effect
+
+        def malformed_large_batch(model, messages, options=None, format=None, **kwargs):
+            reply = fused(model, messages, options, format)
+            # Garble only batches bigger than two, like a model losing count
+            if len(mock_ollama.sent_texts[-1]) > 2:
+                return {"message": {"role": "assistant", "content": '{"translations": ["only one"]}'}}
+            return reply
+
+        mock_ollama.AsyncClient.return_value.chat.side_effect = malformed_large_batch
+
+        texts = [(text, None) for text in "一二三四"]
+        results = translator.translate_batch_with_result(texts)
+
+        # [一二三四] fails, then [一二] and [三四] each succeed
+        assert mock_ollama.AsyncClient.return_value.chat.await_count == 3
+        assert [r.text for r in results] == [f"Translated: {t}..." for t in "一二三四"]
+
+    def test_translate_batch_with_result_bounds_requests(self, mock_ollama, translation_config):
+        """Test that batches which never parse cost at most one split before going per-text."""
+        translator = LocalTranslator(translation_config)
+        single = mock_ollama.AsyncClient.return_value.chat.side_effect
+
+        def invalid_batch(model, messages, options=None, format=None, **kwargs):
+            if format == "json":
+                return {"message": {"role": "assistant", "content": "not json"}}
+            return single(model, messages, options)
+
+        mock_ollama.AsyncClient.return_value.chat.side_effect = invalid_batch
+
+        texts = [(text, None) for text in "一二三四五六七八"]
+        results = translator.translate_batch_with_result(texts)
+
+        # [1-8] fails, [1-4] and [5-8] fail, then 8 single requests
+        assert mock_ollama.AsyncClient.return_value.chat.await_count == 11
+        assert [r.text for r in results] == [f"Translated: {t}..." for t in "一二三四五六七八"]
+
+    def test_translate_batch_with_result_dedupes(self, mock_ollama, translation_config):
+        """Test that repeated (text, context) pairs are sent once and scattered back."""
+        translator = LocalTranslator(translation_config)
+        chat = mock_ollama.AsyncClient.return_value.chat
+
+        texts = [("返回结果", "comment"), ("初始化", "comment"), ("返回结果", "comment")] * 3
+        results = translator.translate_batch_with_result(texts)
+
+        assert chat.await_count == 1
+        assert mock_ollama.sent_texts == [["返回结果", "初始化"]]
+        assert [r.text for r in results] == [
+            "Translated: 返回结果...", "Translated: 初始化...", "Translated: 返回结果...",
+        ] * 3
+
+    def test_translate_batch_reuses_client(self, mock_ollama, translation_config):
+        """Test that sync batch calls share one AsyncClient until close()."""
+        translator = LocalTranslator(translation_config)
+
+        translator.translate_batch_with_result([("一", None), ("二", None)])
+        translator.translate_batch_with_result([("三", None), ("四", None)])
+        assert mock_ollama.AsyncClient.call_count == 1
+
+        translator.close()
+        mock_ollama.AsyncClient.return_value.close.assert_awaited_once()
+
+    def test_translate_batch_with_result_too_long(self, mock_ollama, translation_config):
+        """Test that over-long texts are reported individually as failures."""
+        translation_config.max_text_length = 5
+        translator = LocalTranslator(translation_config)
+
+        results = translator.translate_batch_with_result([("太长的文本内容", None), ("短", None)])
+
+        assert results[0].success is False
+        assert results[1].success is True
+
+    @pytest.mark.asyncio
+    async def test_translate_batch_with_result_async(self, mock_ollama, translation_config):
+        """Test async batched translation."""
+        translator = LocalTranslator(translation_config)
+
+        results = await translator.translate_batch_with_result_async(
+            [("第一条注释", "comment"), ("第二条注释", "comment")]
+        )
+
+        assert mock_ollama.AsyncClient.return_value.chat.await_count == 1
+        assert [r.text for r in results] == [
+            "Translated: 第一条注释...", "Translated: 第二条注释...",
+        ]
+
     def test_translate_handles_errors(self, mock_ollama, translation_config):
         """Test that translation errors are handled gracefully."""
         translator = LocalTranslator(translation_config)
 
-        # Make generate() raise an error
-        mock_ollama.generate.side_effect = Exception("API Error")
+        # Make chat() raise an error
+        mock_ollama.chat.side_effect = Exception("API Error")
 
         original_text = "测试文本"
         result = translator.translate(original_text, context="comment")
@@ -123,6 +396,55 @@ class TestLocalTranslator:
         # Should return original text on error
         assert result == original_text
 
+    def test_num_predict_budget(self, mock_ollama, translation_config):
+        """Test the output token budget's per-script scaling and cap."""
+        translation_config.max_num_predict = 300
+        translator = LocalTranslator(translation_config)
+
+        assert translator._num_predict("短") == 17
+        assert translator._num_predict("注" * 100) == 166
+        assert translator._num_predict("a" * 90) == 46
+        assert translator._num_predict("注" * 100 + "a" * 90) == 196
+        assert translator._num_predict("注" * 1000) == 300
+
+        translator.translate("注" * 100)
+        assert mock_ollama.chat.call_args.kwargs["options"]["num_predict"] == 166
+
+    def test_stop_on_blank_line_unless_source_has_one(self, mock_ollama, translation_config):
+        """Test that a blank line ends the reply only when the source has none."""
+        translator = LocalTranslator(translation_config)
+
+        translator.translate("第一行\n第二行")
+        assert mock_ollama.chat.call_args.kwargs["options"]["stop"] == ["\n\n"]
+
+        translator.translate("第一段\n\n第二段")
+        assert "stop" not in mock_ollama.chat.call_args.kwargs["options"]
+
+    def test_num_thread_passed_when_set(self, mock_ollama, translation_config):
+        """Test that num_thread is only sent when configured, and then on every request."""
+        translator = LocalTranslator(translation_config)
+        translator.translate("测试")
+        assert "num_thread" not in mock_ollama.chat.call_args.kwargs["options"]
+
+        translation_config.num_thread = 6
+        translator = LocalTranslator(translation_config)
+        translator.translate("另一个测试")
+
+        assert mock_ollama.generate.call_args.kwargs["options"]["num_thread"] == 6
+        assert mock_ollama.chat.call_args.kwargs["options"]["num_thread"] == 6
+
+    def test_translate_uses_fixed_system_prompt(self, mock_ollama, translation_config):
+        """Test that the system turn is identical across requests."""
+        translator = LocalTranslator(translation_config)
+
+        translator.translate("第一条", context="comment")
+        translator.translate("第二条", context="docstring")
+
+        first, second = (call.kwargs["messages"] for call in mock_ollama.chat.call_args_list)
+        assert first[0] == second[0]
+        assert first[0]["role"] == "system"
+        assert first[1] == {"role": "user", "content": "第一条"}
+
     def test_translate_preserves_formatting(self, mock_ollama, translation_config):
         """Test that translation attempts to preserve formatting."""
         translator = LocalTranslator(translation_config)
@@ -0,0 +1,56 @@
+"""Tests for the walker module."""
+
+import pytest
+from pathlib import Path
+from code_translator.walker import iter_source_files
+
+
+class TestIterSourceFiles:
+    """Test the iter_source_files directory walker."""
+
+    def _names(self, root, **kwargs):
+        return sorted(
+            Path(entry.path).relative_to(root).as_posix()
+            for entry in iter_source_files(root, **kwargs)
+        )
+
+    def test_recursive_walk(self, temp_dir):
+        """Test that nested files are found."""
+        (temp_dir / "a" / "b").mkdir(parents=True)
+        (temp_dir / "top.py").write_text("")
+        (temp_dir / "a" / "mid.py").write_text("")
+        (temp_dir / "a" / "b" / "deep.py").write_text("")
+
+        assert self._names(temp_dir) == ["a/b/deep.py", "a/mid.py", "top.py"]
+
+    def test_non_recursive_walk(self, temp_dir):
+        """Test that subdirectories are not entered when recursive=False."""
+        (temp_dir / "sub").mkdir()
+        (temp_dir / "top.py").write_text("")
+        (temp_dir / "sub" / "nested.py").write_text("")
+
+        assert self._names(temp_dir, recursive=False) == ["top.py"]
+
+    def test_skip_dirs_pruned(self, temp_dir):
+        """Test that skipped directories are not descended into."""
+        (temp_dir / ".git").mkdir()
+        (temp_dir / "node_modules" / "pkg").mkdir(parents=True)
+        (temp_dir / ".git" / "hook.py").write_text("")
+        (temp_dir / "node_modules" / "pkg" / "index.js").write_text("")
+        (temp_dir / "main.py").write_text("")
+
+        names = self._names(temp_dir, skip_dirs={".git", "node_modules"})
+        assert names == ["main.py"]
+
+    def test_skip_extensions(self, temp_dir):
+        """Test that skipped extensions are filtered case-insensitively."""
+        (temp_dir / "main.py").write_text("")
+        (temp_dir / "main.pyc").write_bytes(b"")
+        (temp_dir / "IMAGE.PNG").write_bytes(b"")
+
+        names = self._names(temp_dir, skip_exts={".pyc", ".png"})
+        assert names == ["main.py"]
+
+    def test_empty_directory(self, temp_dir):
+        """Test walking an empty directory."""
+        assert self._names(temp_dir) == []
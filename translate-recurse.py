@@ -1,99 +1,322 @@
 from googletrans import Translator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import argparse
+import codecs
+import functools
+import hashlib
+import json
+import logging
 import os
+import re
+import sqlite3
+import tempfile
+import threading
 import time
 
+# Files translated at once; each waits on the network, not the CPU
+MAX_WORKERS = 8
+# Directories never worth translating
+SKIP_DIRS = frozenset({
+    '.git', '.hg', '.svn', 'node_modules', '__pycache__', '.venv', 'venv', '.tox',
+    'dist', 'build', 'target', '.mypy_cache', '.pytest_cache', '.idea', '.vscode',
+})
+
+# Files larger than this are skipped without being read
+MAX_FILE_SIZE = 1 << 20
+
+# Longest text sent in one request (Google Translate's per-request limit)
+CHUNK_CHARS = 5000
+# Chunk requests in flight at once across all files, and attempts per chunk
+CHUNK_WORKERS = 4
+CHUNK_RETRIES = 3
+
+# Record of files already processed, by (mtime_ns, size), relative to the walk root
+PROCESSED_PATH = os.path.join('.', '.translate-recurse-cache.json')
+
+# Translations persist here between runs
+CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'translate-recurse', 'cache.db')
+
+# This script's own stat, so the walk can skip it under any path
+_SELF_STAT = os.stat(__file__)
+
+_local = threading.local()
+# Shared by every file so its threads, and their Translators, live for the whole run
+_chunk_executor = ThreadPoolExecutor(max_workers=CHUNK_WORKERS, thread_name_prefix='chunk')
+_db = None
+_db_lock = threading.Lock()
+logger = logging.getLogger('translate-recurse')
+
+# CJK Unified Ideographs, compiled once
+_CJK_RE = re.compile('[\u4e00-\u9fff]')
+# Their UTF-8 encodings (E4 B8 80 to E9 BF BF), loosened to E4-E9 lead bytes; a
+# superset used to rule files out before decoding them
+_CJK_BYTES_RE = re.compile(b'[\xe4-\xe9][\x80-\xbf][\x80-\xbf]')
+
+# Text formats worth translating; anything else is skipped by name without being opened
+SUPPORTED_EXTS = frozenset({
+    '.py', '.pyi', '.js', '.jsx', '.mjs', '.ts', '.tsx', '.vue',
+    '.java', '.kt', '.scala', '.go', '.rs', '.rb', '.php', '.swift',
+    '.c', '.cc', '.cpp', '.cxx', '.h', '.hh', '.hpp', '.cs', '.m',
+    '.sh', '.bash', '.lua', '.pl', '.r', '.sql',
+    '.html', '.htm', '.css', '.scss', '.less', '.xml',
+    '.json', '.yaml', '.yml', '.toml', '.ini', '.cfg', '.conf', '.properties',
+    '.md', '.rst', '.txt',
+})
+
 def is_chinese_text(text):
     """Check if the text contains Chinese characters"""
-    for char in text:
-        # Check for Chinese Unicode ranges
-        if '\u4e00' <= char <= '\u9fff':
-            return True
-    return False
+    return _CJK_RE.search(text) is not None
 
-def translate_text(text, translator):
-    """Translate text with chunking for large texts"""
-    # If text is too long, split it into chunks
-    if len(text) > 5000:
-        chunks = []
-        # Split text into chunks of 5000 characters
-        for i in range(0, len(text), 5000):
-            chunk = text[i:i+5000]
-            try:
-                translated_chunk = translator.translate(chunk, src='zh-CN', dest='en').text
-                chunks.append(translated_chunk)
-                # Add delay to avoid rate limiting
-                time.sleep(1)
-            except Exception as e:
+def thread_translator():
+    """Return this thread's Translator, creating it on first use"""
+    # googletrans.Translator isn't documented as thread-safe, so each thread gets one
+    translator = getattr(_local, 'translator', None)
+    if translator is None:
+        translator = _local.translator = Translator()
+    return translator
+
+def is_supported_file(file_path):
+    """Check by extension alone whether a file is a text format worth translating"""
+    return os.path.splitext(file_path)[1].lower() in SUPPORTED_EXTS
+
+def disk_cache():
+    """Return the SQLite connection for translations kept between runs, opening it on first use"""
+    global _db
+    with _db_lock:
+        if _db is None:
+            os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+            _db = sqlite3.connect(CACHE_PATH, check_same_thread=False)
+            _db.execute("PRAGMA journal_mode=WAL")
+            _db.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        return _db
+
+@functools.lru_cache(maxsize=4096)
+def translate_cached(text):
+    """Translate text once per run; repeats (license headers, copied comments) hit the cache"""
+    # Check translations from earlier runs before going to the network
+    key = hashlib.sha1(text.encode('utf-8')).hexdigest()
+    db = disk_cache()
+    with _db_lock:
+        row = db.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+    if row is not None:
+        return row[0]
+
+    # Failures raise, and lru_cache doesn't remember exceptions, so they get retried
+    translation = thread_translator().translate(text, src='zh-CN', dest='en').text
+    with _db_lock:
+        db.execute("INSERT OR IGNORE INTO cache (key, value) VALUES (?, ?)", (key, translation))
+        db.commit()
+    return translation
+
+def translate_chunk(chunk):
+    """Translate one chunk, backing off and retrying when the service pushes back"""
+    for attempt in range(CHUNK_RETRIES):
+        try:
+            return translate_cached(chunk)
+        except Exception as e:
+            if attempt == CHUNK_RETRIES - 1:
                 print(f"Error translating chunk: {e}")
                 # Return the original chunk if translation fails
-                chunks.append(chunk)
-        return ''.join(chunks)
+                return chunk
+            # Usually rate limiting; wait 1s, 2s, ... before trying again
+            time.sleep(2 ** attempt)
+
+def split_chunks(text):
+    """Split text into chunks of at most CHUNK_CHARS, breaking at line ends where possible"""
+    chunks = []
+    current = []
+    size = 0
+    for line in text.splitlines(keepends=True):
+        if size + len(line) > CHUNK_CHARS and current:
+            chunks.append(''.join(current))
+            current = []
+            size = 0
+        # A single overlong line still has to be cut mid-line
+        while len(line) > CHUNK_CHARS:
+            chunks.append(line[:CHUNK_CHARS])
+            line = line[CHUNK_CHARS:]
+        current.append(line)
+        size += len(line)
+    if current:
+        chunks.append(''.join(current))
+    return chunks
+
+def translate_text(text):
+    """Translate text with chunking for large texts"""
+    # If text is too long, split it into chunks
+    if len(text) > CHUNK_CHARS:
+        chunks = split_chunks(text)
+        # The shared executor caps chunks in flight at CHUNK_WORKERS however
+        # many file threads submit at once; map keeps them in order
+        return ''.join(_chunk_executor.map(translate_chunk, chunks))
     else:
         try:
-            return translator.translate(text, src='zh-CN', dest='en').text
+            return translate_cached(text)
         except Exception as e:
             print(f"Error translating text: {e}")
             return text
 
-def translate_file(file_path, translator):
-    """Translate a file from Chinese to English and replace it in-place"""
+def translate_file(file_path):
+    """Translate a file from Chinese to English and replace it in-place
+
+    Returns True if the file was translated, False if it had nothing to
+    translate, and None if translating it failed.
+    """
     try:
-        # Skip non-text files (binary files)
-        if os.path.splitext(file_path)[1].lower() in ['.pyc', '.pyo', '.so', '.dll', '.exe', '.bin']:
+        # Skip binaries and other unsupported files before opening them
+        if not is_supported_file(file_path):
             return False
-            
+
         # Read the content of the file
+        with open(file_path, 'rb') as f:
+            # Same 1 MB cap as code-translator; bigger files are data, not source
+            if os.fstat(f.fileno()).st_size > MAX_FILE_SIZE:
+                return False
+            head = f.read(4096)
+            # NUL bytes or invalid UTF-8 in the first block mean binary; don't read the rest
+            if b'\x00' in head:
+                return False
+            try:
+                # Incremental so a character cut at the block boundary isn't an error
+                codecs.getincrementaldecoder('utf-8')().decode(head)
+            except UnicodeDecodeError:
+                return False
+            data = head + f.read()
+
+        # Most files have no Chinese; rule them out on the raw bytes without decoding
+        if not _CJK_BYTES_RE.search(data):
+            return False
+
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            content = data.decode('utf-8')
         except UnicodeDecodeError:
             # Skip files that can't be decoded as text
             return False
+        # Match text-mode reading, which turns \r\n and \r into \n
+        if '\r' in content:
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
             
         # Check if file contains Chinese text
         if not is_chinese_text(content):
             return False
             
         # Translate the content
-        translated_content = translate_text(content, translator)
-        
-        # Write the translated text back to the original file
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(translated_content)
-            
+        translated_content = translate_text(content)
+
+        # Nothing translated (e.g. every request failed); leave the file and its mtime alone
+        if translated_content == content:
+            return None
+
+        # Write the translated text back to the original file, via a temp file so
+        # a crash mid-write can't leave it truncated
+        mode = os.stat(file_path).st_mode
+        f = tempfile.NamedTemporaryFile(
+            'w', encoding='utf-8', dir=os.path.dirname(file_path), delete=False
+        )
+        try:
+            with f:
+                f.write(translated_content)
+            os.chmod(f.name, mode)
+            os.replace(f.name, file_path)
+        except BaseException:
+            os.unlink(f.name)
+            raise
+
         return True
         
     except Exception as e:
         print(f"Error translating {file_path}: {e}")
-        return False
+        return None
+
+def walk_files(root):
+    """Yield paths of all files under root, never entering SKIP_DIRS"""
+    # scandir classifies entries from the directory read itself, without a stat per file
+    stack = [root]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIP_DIRS:
+                            stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry.path
+        except OSError:
+            # Unreadable directory - skip it like os.walk does
+            continue
+
+def load_processed():
+    """Load the (mtime_ns, size) of files finished on earlier runs"""
+    try:
+        with open(PROCESSED_PATH, encoding='utf-8') as f:
+            return {path: tuple(stamp) for path, stamp in json.load(f).items()}
+    except (OSError, ValueError):
+        return {}
+
+def save_processed(processed):
+    """Write the processed-file record for the next run"""
+    with open(PROCESSED_PATH, 'w', encoding='utf-8') as f:
+        json.dump(processed, f, ensure_ascii=False)
+
+def stat_key(file_path):
+    """Return the (mtime_ns, size) that identifies a file's current contents"""
+    st = os.stat(file_path)
+    return st.st_mtime_ns, st.st_size
 
 def main():
-    # Create a translator object
-    translator = Translator()
-    
+    parser = argparse.ArgumentParser(description="Translate Chinese files under the current directory to English in place")
+    parser.add_argument('-v', '--verbose', action='store_true', help="log every file checked")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING, format='%(message)s')
+
+    # Files finished on earlier runs are skipped until they change
+    processed = load_processed()
+
+    # Collect candidate files first so they can be translated in parallel
+    paths = []
+
+    # Walk through all directories recursively
+    for file_path in walk_files('.'):
+        if not is_supported_file(file_path):
+            continue
+
+        # Skip the script's own record
+        if file_path == PROCESSED_PATH:
+            continue
+
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            continue
+        # Skip the script itself, matched by identity rather than by name
+        if os.path.samestat(st, _SELF_STAT):
+            continue
+        if processed.get(file_path) == (st.st_mtime_ns, st.st_size):
+            continue
+
+        logger.debug("Checking: %s", file_path)
+        paths.append(file_path)
+
     # Count of translated files
     translated_count = 0
-    
-    # Walk through all directories recursively
-    for root, dirs, files in os.walk('.'):
-        # Skip .git directory
-        if '.git' in dirs:
-            dirs.remove('.git')
-            
-        for file in files:
-            file_path = os.path.join(root, file)
-            
-            # Skip the script itself
-            if file_path.endswith('translate.py'):
-                continue
-                
-            print(f"Checking: {file_path}")
-            
+
+    # Each file mostly waits on the translation API, so threads overlap that wait
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {executor.submit(translate_file, path): path for path in paths}
+        for future in as_completed(futures):
             # Translate the file if it contains Chinese text
-            if translate_file(file_path, translator):
+            result = future.result()
+            if result:
                 translated_count += 1
-                print(f"Translated: {file_path}")
-    
+                print(f"Translated: {futures[future]}")
+            # Failures are left out so the next run retries them
+            if result is not None:
+                try:
+                    processed[futures[future]] = stat_key(futures[future])
+                except OSError:
+                    pass
+
+    save_processed(processed)
     print(f"Translation complete! {translated_count} files translated.")
 
 if __name__ == "__main__":